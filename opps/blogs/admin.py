@@ -2,7 +2,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import IntegrityError
 from django.utils.translation import ugettext_lazy as _
 
 from opps.core.admin import (apply_opps_rules, PublishableAdmin,
@@ -12,7 +13,8 @@ from opps.contrib.multisite.admin import AdminViewPermission
 from opps.containers.admin import ContainerAdmin
 from opps.channels.models import Channel
 
-from .forms import BlogPostAdminForm
+from .cache import get_blog_channel, get_user_blogs
+from .forms import BlogPostAdminForm, BlogPostActionForm
 from .models import (
     Category, Blog, BlogRelated, BlogChannelRelated, BlogPost, BlogPostRelated,
     BlogPostAudio, BlogPostVideo, BlogLink, )
@@ -27,9 +29,9 @@ class BlogAdminPermission(AdminViewPermission):
         if request.user.is_superuser:
             return queryset
 
-        blogs = Blog.objects.filter(user=request.user)
-        if blogs.exists():
-            return queryset.filter(blog__in=blogs)
+        blogs = get_user_blogs(request)
+        if blogs:
+            return queryset.filter(blog__in=[pk for pk, name in blogs])
         return queryset.none()
 
     def get_form(self, request, obj=None, **kwargs):
@@ -38,21 +40,15 @@ class BlogAdminPermission(AdminViewPermission):
         if request.user.is_superuser:
             return form
 
-        blogs = Blog.objects.filter(user=request.user)
-        if blogs.exists():
-            form.base_fields['blog'].choices = (
-                (b.id, b.name) for b in blogs
-            )
+        blogs = get_user_blogs(request)
+        if blogs:
+            form.base_fields['blog'].choices = blogs
         return form
 
     def has_add_permission(self, request):
         if request.user.is_superuser:
             return True
-
-        blogpermission = Blog.objects.filter(user=request.user)
-        if len(blogpermission) == 0:
-            return False
-        return True
+        return bool(get_user_blogs(request))
 
 
 @apply_opps_rules('blogs')
@@ -68,6 +64,10 @@ class BlogPostRelatedInline(admin.TabularInline):
     verbose_name_plural = _('Related blog posts')
     sortable_field_name = 'order'
 
+    def queryset(self, request):
+        qs = super(BlogPostRelatedInline, self).queryset(request)
+        return qs.filter(automatic=False)
+
 
 @apply_opps_rules('blogs')
 class BlogPostAudioInline(admin.StackedInline):
@@ -97,6 +97,9 @@ class BlogPostAdmin(ContainerAdmin, BlogAdminPermission):
     inlines = [BlogPostRelatedInline]
     list_display = ['title', 'category', 'published', 'get_http_absolute_url']
     raw_id_fields = ['main_image', 'channel', 'albums', 'category']
+    actions = ['publish_posts', 'unpublish_posts', 'change_category',
+               'change_blog']
+    action_form = BlogPostActionForm
 
     fieldsets = (
         (_('Identification'), {
@@ -116,17 +119,22 @@ class BlogPostAdmin(ContainerAdmin, BlogAdminPermission):
 
     def save_model(self, request, obj, form, change):
         # TODO: perhaps a get_or_create here
-        try:
-            obj.channel = Channel.objects.get(
-                slug=settings.OPPS_BLOGS_CHANNEL
-            )
-        except Channel.DoesNotExist:
+        obj.channel = get_blog_channel(obj.site)
+        if obj.channel is None:
             raise Channel.DoesNotExist(_('%s channel is not created') % (
                 settings.OPPS_BLOGS_CHANNEL)
             )
 
         super(BlogPostAdmin, self).save_model(request, obj, form, change)
 
+    def queryset(self, request):
+        # The changelist only adds its own select_related() when none is
+        # set, and that one skips the nullable category. category__parent
+        # is read by Category.__unicode__, get_http_absolute_url reads the
+        # stored path and site_domain only.
+        qs = super(BlogPostAdmin, self).queryset(request)
+        return qs.select_related('blog', 'category__parent', 'site')
+
     def has_change_permission(self, request, obj=True):
         if request.user.is_superuser:
             return True
@@ -136,6 +144,70 @@ class BlogPostAdmin(ContainerAdmin, BlogAdminPermission):
         list_filter = super(BlogPostAdmin, self).list_filter
         return list_filter + ['category', 'blog']
 
+    def limit_action_form(self, request, form):
+        if not request.user.is_superuser:
+            form.limit_to_blogs([pk for pk, name in get_user_blogs(request)])
+        return form
+
+    def changelist_view(self, request, extra_context=None):
+        response = super(BlogPostAdmin, self).changelist_view(
+            request, extra_context)
+        action_form = getattr(response, 'context_data', {}).get(
+            'action_form')
+        if action_form is not None:
+            self.limit_action_form(request, action_form)
+        return response
+
+    def get_action_target(self, request, field):
+        """Chosen category or blog, None when missing or not one of the
+        user's blogs
+        """
+        form = self.limit_action_form(request, self.action_form(request.POST))
+        form.fields['action'].choices = self.get_action_choices(request)
+        if form.is_valid():
+            return form.cleaned_data[field]
+
+    def change_posts(self, request, queryset, **fields):
+        """Run the set-based BlogPostQuerySet.change for an action"""
+        try:
+            count = queryset.change(**fields)
+        except IntegrityError:
+            self.message_user(
+                request, _('Nothing changed: some posts would share the url '
+                           'of another post of the blog.'), messages.ERROR)
+            return
+        self.message_user(request, _('%d blog posts changed.') % count)
+
+    def publish_posts(self, request, queryset):
+        self.change_posts(request, queryset, published=True)
+    publish_posts.short_description = _('Publish selected blog posts')
+
+    def unpublish_posts(self, request, queryset):
+        self.change_posts(request, queryset, published=False)
+    unpublish_posts.short_description = _('Unpublish selected blog posts')
+
+    def change_category(self, request, queryset):
+        category = self.get_action_target(request, 'category')
+        if category is None:
+            self.message_user(request, _('Choose a category of your blogs.'),
+                              messages.ERROR)
+            return
+        # Categories belong to a blog, posts of other blogs stay put
+        queryset = queryset.filter(blog=category.blog_id)
+        self.change_posts(request, queryset, category=category)
+    change_category.short_description = _(
+        'Move selected blog posts to the chosen category')
+
+    def change_blog(self, request, queryset):
+        blog = self.get_action_target(request, 'blog')
+        if blog is None:
+            self.message_user(request, _('Choose one of your blogs.'),
+                              messages.ERROR)
+            return
+        self.change_posts(request, queryset, blog=blog, category=None)
+    change_blog.short_description = _(
+        'Move selected blog posts to the chosen blog')
+
 
 @apply_opps_rules('blogs')
 class BlogRelatedInline(admin.TabularInline):
@@ -214,29 +286,19 @@ class CategoryAdmin(PublishableAdmin):
                                                    **kwargs)
         if request.user.is_superuser:
             return form
-        try:
-            blogpermission = Blog.objects.filter(user=request.user)
-            form.base_fields['blog'].choices = (
-                (b.id, b.name) for b in blogpermission)
-        except Blog.DoesNotExist:
-            pass
+        form.base_fields['blog'].choices = get_user_blogs(request)
         return form
 
     def has_add_permission(self, request):
         if request.user.is_superuser:
             return True
-
-        blogpermission = Blog.objects.filter(user=request.user)
-        if not blogpermission.exists():
-            return False
-        return True
+        return bool(get_user_blogs(request))
 
     def queryset(self, request):
         qs = super(CategoryAdmin, self).queryset(request)
         if request.user.is_superuser:
             return qs
-
-        return qs.filter(blog__user=request.user)
+        return qs.filter(blog__in=[pk for pk, name in get_user_blogs(request)])
 
     def has_change_permission(self, request, obj=True):
         if request.user.is_superuser:
@@ -0,0 +1,428 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from functools import wraps
+from hashlib import md5
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import get_current_site
+from django.core.cache import cache
+from django.db.models import get_model
+from django.template import loader
+from django.utils import timezone
+from django.utils.cache import patch_response_headers
+from django.views.decorators.cache import cache_page
+
+from opps.channels.models import Channel
+
+from .conf import settings
+
+
+def _cache_key(_type, *args):
+    parts = [getattr(settings, 'OPPS_CACHE_PREFIX', 'opps'), 'blogs', _type]
+    parts.extend(args)
+    key = ':'.join(['{0}'.format(part) for part in parts])
+    return md5(key.replace(' ', '').encode('utf-8')).hexdigest()
+
+
+def get_blog_channel(site):
+    """Return the OPPS_BLOGS_CHANNEL channel of site, or None when it is
+    not created. Cached by (site, channel slug) until a Channel of that
+    site is saved or deleted.
+    """
+    cachekey = _cache_key('channel', site.pk, settings.OPPS_BLOGS_CHANNEL)
+    channel = cache.get(cachekey)
+    if channel is not None:
+        return channel
+
+    try:
+        channel = Channel.objects.get(slug=settings.OPPS_BLOGS_CHANNEL,
+                                      site=site)
+    except Channel.DoesNotExist:
+        return None
+
+    cache.set(cachekey, channel, settings.OPPS_BLOGS_CACHE_EXPIRE)
+    return channel
+
+
+def delete_blog_channel(site_id):
+    cache.delete(_cache_key('channel', site_id,
+                            settings.OPPS_BLOGS_CHANNEL))
+
+
+def delete_blog(slug):
+    cache.delete(_cache_key('blog', slug))
+
+
+def get_blog_authors(blog):
+    """Users of blog as a queryset on their cached ids, so views and
+    templates get a real queryset without the join on the membership
+    table. The ids are cached until the membership changes.
+    """
+    cachekey = _cache_key('authors', blog.pk)
+    ids = cache.get(cachekey)
+    if ids is None:
+        ids = list(blog.user.values_list('pk', flat=True))
+        cache.set(cachekey, ids, settings.OPPS_BLOGS_CACHE_EXPIRE)
+    return get_user_model().objects.filter(pk__in=ids)
+
+
+def delete_blog_authors(blog_id):
+    cache.delete(_cache_key('authors', blog_id))
+
+
+def get_user_blogs(request):
+    """(id, name) of the blogs request.user is a member of. Memoized on
+    the request, as the admin asks several times per page, and cached per
+    user until the membership or one of those blogs changes.
+    """
+    if not hasattr(request, '_user_blogs'):
+        cachekey = _cache_key('userblogs', request.user.pk)
+        blogs = cache.get(cachekey)
+        if blogs is None:
+            blogs = list(get_model('blogs', 'Blog').objects.filter(
+                user=request.user).values_list('pk', 'name'))
+            cache.set(cachekey, blogs, settings.OPPS_BLOGS_CACHE_EXPIRE)
+        request._user_blogs = blogs
+    return request._user_blogs
+
+
+def delete_user_blogs(*user_ids):
+    cache.delete_many([_cache_key('userblogs', pk) for pk in user_ids])
+
+
+class CachedCategory(object):
+    """Picklable snapshot of a published Category, with its url and
+    children resolved, as stored by get_blog_categories
+    """
+
+    def __init__(self, category, blog_slug):
+        self.pk = self.id = category.pk
+        self.name = category.name
+        self.slug = category.slug
+        self.long_slug = category.long_slug
+        self.parent_id = category.parent_id
+        self.show_in_menu = category.show_in_menu
+        self.group = category.group
+        self.order = category.order
+        self.url = "/{}/{}/{}/".format(settings.OPPS_BLOGS_CHANNEL,
+                                       blog_slug, category.long_slug)
+        self.children = []
+
+    def __unicode__(self):
+        return "/{}/".format(self.long_slug)
+
+    def get_absolute_url(self):
+        return self.url
+
+
+def get_blog_categories(blog):
+    """Published categories of blog as CachedCategory objects, in the
+    order of Category.Meta.ordering, built with a single query and cached
+    until a category of the blog or the blog itself changes.
+    """
+    cachekey = _cache_key('categories', blog.pk)
+    categories = cache.get(cachekey)
+    if categories is None:
+        categories = [CachedCategory(category, blog.slug) for category in
+                      blog.categories.filter(published=True)]
+        nodes = dict((category.pk, category) for category in categories)
+        for category in categories:
+            if category.parent_id in nodes:
+                nodes[category.parent_id].children.append(category)
+        cache.set(cachekey, categories, settings.OPPS_BLOGS_CACHE_EXPIRE)
+    return categories
+
+
+def delete_blog_categories(blog_id):
+    cache.delete(_cache_key('categories', blog_id))
+
+
+class CachedBlog(object):
+    """Picklable snapshot of a published Blog, as stored by
+    get_site_blogs
+    """
+
+    def __init__(self, blog):
+        self.pk = self.id = blog.pk
+        self.name = blog.name
+        self.slug = blog.slug
+        self.type = blog.type
+        self.description = blog.description
+        self.date_available = blog.date_available
+        self.url = blog.get_absolute_url()
+
+    def __unicode__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return self.url
+
+
+BLOG_ORDERINGS = ('name', 'slug', 'date_available')
+
+
+def _site_blogs_version(site_id, reset=False):
+    cachekey = _cache_key('blogsversion', site_id)
+    version = None if reset else cache.get(cachekey)
+    if version is None:
+        version = uuid4().hex
+        cache.set(cachekey, version, settings.OPPS_BLOGS_CACHE_EXPIRE)
+    return version
+
+
+def get_site_blogs(site, type='blog', limit=None, order='name'):
+    """Published blogs of type on site as CachedBlog objects, sorted by
+    order (one of BLOG_ORDERINGS, '-' prefixed for descending) and cut at
+    limit. Cached per site, type, order and limit until a blog of the
+    site changes or a scheduled blog goes live.
+    """
+    if order.lstrip('-') not in BLOG_ORDERINGS:
+        order = 'name'
+    cachekey = _cache_key('blogs', site.pk, type, order, limit,
+                          _site_blogs_version(site.pk))
+    blogs = cache.get(cachekey)
+    if blogs is not None:
+        return blogs
+
+    now = timezone.now()
+    Blog = get_model('blogs', 'Blog')
+    queryset = Blog.objects.filter(site=site, type=type, published=True)
+    blogs = [CachedBlog(blog) for blog in queryset.filter(
+        date_available__lte=now).order_by(order, 'pk')[:limit]]
+
+    scheduled = queryset.filter(date_available__gt=now).order_by(
+        'date_available').values_list('date_available', flat=True)[:1]
+    cache.set(cachekey, blogs, timeout_until(
+        scheduled[0] if scheduled else None,
+        settings.OPPS_BLOGS_CACHE_EXPIRE))
+    return blogs
+
+
+def delete_site_blogs(site_id):
+    _site_blogs_version(site_id, reset=True)
+
+
+class CachedPost(object):
+    """Picklable snapshot of the latest post of a related blog"""
+
+    def __init__(self, pk, title, path, date_listed):
+        self.pk = self.id = pk
+        self.title = title
+        self.date_listed = self.date_available = date_listed
+        self.url = "/{}/{}.html".format(settings.OPPS_BLOGS_CHANNEL, path)
+
+    def __unicode__(self):
+        return self.title
+
+    def get_absolute_url(self):
+        return self.url
+
+
+class CachedRelated(object):
+    """Picklable snapshot of a related blog (with its latest post in
+    .latest) or of a related channel, as stored by get_blog_related
+    """
+
+    def __init__(self, obj, latest=None):
+        self.pk = self.id = obj.pk
+        self.name = obj.name
+        self.slug = obj.slug
+        self.url = obj.get_absolute_url()
+        self.latest = latest
+
+    def __unicode__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return self.url
+
+
+def get_blog_related(blog):
+    """{'blogs': [...], 'channels': [...]}, the published related blogs
+    and channels of blog in their order, each blog with its latest listed
+    post. Cached until a relation, a related blog or one of its posts
+    changes, and at most until one of those blogs has a scheduled post
+    going live.
+    """
+    cachekey = _cache_key('related', blog.pk)
+    related = cache.get(cachekey)
+    if related is not None:
+        return related
+
+    now = timezone.now()
+    BlogPost = get_model('blogs', 'BlogPost')
+    blogs = []
+    for relation in get_model('blogs', 'BlogRelated').objects.filter(
+            blog=blog, related__published=True,
+            related__date_available__lte=now,
+    ).select_related('related').order_by('order'):
+        # One LIMIT 1 on the (blog, date_listed) index per related blog
+        latest = BlogPost.objects.listed().filter(
+            blog=relation.related_id,
+        ).values_list('pk', 'title', 'path', 'date_listed')[:1]
+        blogs.append(CachedRelated(relation.related,
+                                   CachedPost(*latest[0]) if latest
+                                   else None))
+    channels = [
+        CachedRelated(relation.related) for relation in
+        get_model('blogs', 'BlogChannelRelated').objects.filter(
+            blog=blog, related__published=True,
+            related__date_available__lte=now,
+        ).select_related('related').order_by('order')]
+    related = {'blogs': blogs, 'channels': channels}
+
+    scheduled = BlogPost.objects.filter(
+        blog__in=[b.pk for b in blogs], date_listed__gt=now,
+    ).order_by('date_listed').values_list('date_listed', flat=True)[:1]
+    cache.set(cachekey, related, timeout_until(
+        scheduled[0] if scheduled else None,
+        settings.OPPS_BLOGS_CACHE_EXPIRE))
+    return related
+
+
+def delete_blog_related(blog_id):
+    cache.delete(_cache_key('related', blog_id))
+
+
+def refresh_related_blogs(blog_ids):
+    """Drop the related blocks showing any of blog_ids, and start a new
+    page generation for the blogs they belong to
+    """
+    for pk, slug in get_model('blogs', 'Blog').objects.filter(
+            blogrelated_blog__related__in=list(blog_ids),
+    ).distinct().values_list('pk', 'slug'):
+        delete_blog_related(pk)
+        mark_blog_changed(slug)
+
+
+def clear_blog_templates():
+    """Start a new version of the resolved templates, e.g. on deploy"""
+    version = uuid4().hex
+    cache.set(_cache_key('templates'), version,
+              settings.OPPS_BLOGS_CACHE_EXPIRE)
+    return version
+
+
+def select_template_name(names):
+    """Name of the first existing template in names. Memoized per list of
+    candidates, which spells out the domain folder, blog slug, suffix and
+    layout_mode, so the loaders are only probed on a miss.
+    """
+    version = cache.get(_cache_key('templates')) or clear_blog_templates()
+    cachekey = _cache_key('template', version, *names)
+    name = cache.get(cachekey)
+    if name is None:
+        name = loader.select_template(names).name
+        cache.set(cachekey, name, settings.OPPS_BLOGS_CACHE_EXPIRE)
+    return name
+
+
+def _next_scheduled(slug):
+    """date_listed of the next post of blog slug (of any blog when slug is
+    None) that is published but not available yet
+    """
+    posts = get_model('blogs', 'BlogPost').objects.filter(
+        date_listed__gt=timezone.now())
+    if slug is not None:
+        posts = posts.filter(blog__slug=slug)
+    dates = posts.order_by('date_listed').values_list('date_listed',
+                                                      flat=True)[:1]
+    return dates[0] if dates else None
+
+
+def _marker_timeout():
+    # A marker dropped before the pages it keys starts a new generation,
+    # and every cached page of the blog is rendered again for nothing
+    return max(settings.OPPS_BLOGS_PAGE_CACHE_EXPIRE,
+               settings.OPPS_BLOGS_CACHE_EXPIRE)
+
+
+def mark_blog_changed(slug):
+    """Record that the pages of blog slug (None for the blog list) changed
+    now, along with the date its next scheduled post goes live.
+    """
+    cache.set(_cache_key('changed', slug),
+              (timezone.now(), _next_scheduled(slug)), _marker_timeout())
+
+
+def get_blog_marker(slug):
+    """(changed, next_scheduled) of blog slug. When next_scheduled is
+    reached it becomes the change date and the following scheduled post
+    is looked up; a missing marker starts at now.
+    """
+    cachekey = _cache_key('changed', slug)
+    marker = cache.get(cachekey)
+    now = timezone.now()
+    if marker is None:
+        marker = (now, _next_scheduled(slug))
+    elif marker[1] and marker[1] <= now:
+        marker = (marker[1], _next_scheduled(slug))
+    else:
+        return marker
+    cache.set(cachekey, marker, _marker_timeout())
+    return marker
+
+
+def get_blog_changed(slug):
+    """Last time the pages of blog slug changed"""
+    return get_blog_marker(slug)[0]
+
+
+def get_blog_generation(slug):
+    return get_blog_changed(slug).strftime('%Y%m%d%H%M%S%f')
+
+
+def timeout_until(scheduled, timeout):
+    """timeout, cut short so it ends right after the date scheduled (if
+    any), and never below one second
+    """
+    if scheduled:
+        due = int((scheduled - timezone.now()).total_seconds()) + 1
+        timeout = max(1, min(timeout, due))
+    return timeout
+
+
+def get_blog_timeout(slug, timeout):
+    """timeout, cut short so it ends when the next scheduled post of blog
+    slug goes live
+    """
+    return timeout_until(get_blog_marker(slug)[1], timeout)
+
+
+def blog_cache_page(*dec_args, **dec_kwargs):
+    """cache_page whose key holds the generation of the blog in the url
+    kwargs (of the blog list when there is none). Any change recorded by
+    mark_blog_changed starts a new generation, so pages can be cached for
+    long and still show edits right away. Cached pages also expire when
+    the next scheduled post goes live.
+    """
+    cache_timeout = (dec_args[0] if dec_args
+                     else settings.OPPS_BLOGS_PAGE_CACHE_EXPIRE)
+    cache_alias = dec_kwargs.pop('cache', None)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapped(request, *args, **kwargs):
+            slug = kwargs.get('blog__slug')
+            timeout = get_blog_timeout(slug, cache_timeout)
+            cache_prefix = u'{0}-{1}-{2}-{3}'.format(
+                slug or '', get_blog_generation(slug),
+                get_current_site(request).domain,
+                getattr(request, 'is_mobile', False))
+
+            do_cache = cache_page(timeout, cache=cache_alias,
+                                  key_prefix=cache_prefix)(func)
+            response = do_cache(request, *args, **kwargs)
+
+            # Browsers and proxies keep the page for OPPS_CACHE_EXPIRE at
+            # most, then revalidate it with the ETag
+            if response.has_header('Expires'):
+                del response['Expires']
+            patch_response_headers(
+                response, min(timeout, settings.OPPS_CACHE_EXPIRE))
+            return response
+        return wrapped
+    return decorator
@@ -13,6 +13,16 @@ class OppsBlogsConf(AppConf):
     CHANNEL = getattr(settings, 'OPPS_BLOGS_CHANNEL', 'blog')
     PROFILE = getattr(settings, 'OPPS_BLOGS_PROFILE', False)
     TYPES = getattr(settings, 'OPPS_BLOGS_TYPES', BLOG_TYPES)
+    CACHE_EXPIRE = getattr(settings, 'OPPS_BLOGS_CACHE_EXPIRE', 60 * 60 * 24)
+    PAGE_CACHE_EXPIRE = getattr(settings, 'OPPS_BLOGS_PAGE_CACHE_EXPIRE',
+                                60 * 60 * 24 * 7)
+    WARM_CACHE = getattr(settings, 'OPPS_BLOGS_WARM_CACHE', False)
+    CURSOR_PAGINATION = getattr(settings, 'OPPS_BLOGS_CURSOR_PAGINATION',
+                                False)
+    INDEX_QUEUE = getattr(settings, 'OPPS_BLOGS_INDEX_QUEUE', False)
+    # Queue publish_scheduled_blogpost for scheduled posts, needs a broker
+    SCHEDULE_PUBLISH = getattr(settings, 'OPPS_BLOGS_SCHEDULE_PUBLISH',
+                               False)
 
     class Meta:
         prefix = 'opps_blogs'
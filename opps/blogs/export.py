@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.encoding import force_bytes
+
+from opps.containers.models import ContainerImage
+
+from .models import BlogPost, BlogPostVideo, BlogPostAudio
+
+
+FIELDS = ('id', 'title', 'slug', 'url', 'category', 'user', 'published',
+          'date_available', 'date_listed', 'tags', 'headline', 'content',
+          'main_image', 'images', 'videos', 'audios')
+
+
+def _media_urls(queryset, owner, media):
+    """{post id: [url, ...]} of a through model queryset"""
+    urls = defaultdict(list)
+    for row in queryset.select_related(media):
+        item = getattr(row, media)
+        if item is not None:
+            url = (item.image_url() if media == 'image'
+                   else item.get_absolute_url())
+            urls[getattr(row, owner)].append(url)
+    return urls
+
+
+def iter_blogpost_rows(blog, chunk_size=1000):
+    """Yield one dict per post of blog, keyed by FIELDS.
+
+    Posts are read in primary key chunks (keyset, not OFFSET) and the
+    media of each chunk is fetched with one query per relation, so
+    memory and query cost per post stay constant whatever the blog size.
+    """
+    posts = BlogPost.objects.filter(blog=blog).select_related(
+        'category', 'user', 'main_image').by_pk()
+
+    last_pk = 0
+    while True:
+        chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        pks = [post.pk for post in chunk]
+        images = _media_urls(ContainerImage.objects.filter(
+            container__in=pks).order_by('order'), 'container_id', 'image')
+        videos = _media_urls(BlogPostVideo.objects.filter(
+            blogpost__in=pks), 'blogpost_id', 'video')
+        audios = _media_urls(BlogPostAudio.objects.filter(
+            blogpost__in=pks), 'blogpost_id', 'audio')
+
+        for post in chunk:
+            yield {
+                'id': post.pk,
+                'title': post.title,
+                'slug': post.slug,
+                'url': post.get_absolute_url(),
+                'category': post.category.long_slug if post.category else None,
+                'user': post.user.get_username() if post.user else None,
+                'published': post.published,
+                'date_available': post.date_available,
+                'date_listed': post.date_listed,
+                'tags': [t.strip() for t in (post.tags or '').split(',')
+                         if t.strip()],
+                'headline': post.headline,
+                'content': post.content,
+                'main_image': (post.main_image.image_url()
+                               if post.main_image else None),
+                'images': images[post.pk],
+                'videos': videos[post.pk],
+                'audios': audios[post.pk],
+            }
+        last_pk = pks[-1]
+
+
+def export_jsonl(rows):
+    """One JSON object per line"""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+class _Echo(object):
+    """File-like object handing back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, (list, tuple)):
+        value = u'|'.join(value)
+    elif hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    elif value is None:
+        value = u''
+    return force_bytes(value)
+
+
+def export_csv(rows):
+    """A header line, then one line per row; lists are '|' separated"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[field]) for field in FIELDS])
+
+
+FORMATS = {
+    'jsonl': (export_jsonl, 'application/x-ndjson'),
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+}
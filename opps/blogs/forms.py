@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 from django import forms
+from django.contrib.admin.helpers import ActionForm
+from django.utils.translation import ugettext_lazy as _
 
-from .models import BlogPost
+from .models import BlogPost, Blog, Category
 
 from opps.core.widgets import OppsEditor
 
@@ -11,3 +13,26 @@ class BlogPostAdminForm(forms.ModelForm):
     class Meta:
         model = BlogPost
         widgets = {'content': OppsEditor()}
+
+
+class CategoryChoiceField(forms.ModelChoiceField):
+
+    def label_from_instance(self, obj):
+        return u'{0}: {1}'.format(obj.blog.name, obj.long_slug)
+
+
+class BlogPostActionForm(ActionForm):
+    """Target of the change category/change blog admin actions"""
+    category = CategoryChoiceField(
+        Category.objects.select_related('blog').order_by('blog__name',
+                                                         'long_slug'),
+        required=False, label=_('Category'))
+    blog = forms.ModelChoiceField(Blog.objects.all(), required=False,
+                                  label=_('Blog'))
+
+    def limit_to_blogs(self, blog_ids):
+        """Only offer the blogs blog_ids and their categories"""
+        self.fields['category'].queryset = self.fields[
+            'category'].queryset.filter(blog__in=blog_ids)
+        self.fields['blog'].queryset = self.fields['blog'].queryset.filter(
+            pk__in=blog_ids)
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import NoArgsCommand
+
+from opps.blogs.cache import clear_blog_templates
+
+
+class Command(NoArgsCommand):
+    help = 'Forget the templates resolved for the blog views (run on deploy)'
+
+    def handle_noargs(self, **options):
+        clear_blog_templates()
+        self.stdout.write('Blog template resolutions cleared')
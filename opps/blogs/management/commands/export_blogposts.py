@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from opps.blogs.export import FORMATS, iter_blogpost_rows
+from opps.blogs.models import Blog
+
+
+class Command(BaseCommand):
+    args = '<blog slug>'
+    help = 'Stream the posts of a blog as JSON lines or CSV'
+    option_list = BaseCommand.option_list + (
+        make_option('--format', dest='format', default='jsonl',
+                    choices=sorted(FORMATS), help='jsonl (default) or csv'),
+        make_option('--output', dest='output', default=None,
+                    help='File to write to, stdout by default'),
+        make_option('--chunk-size', dest='chunk_size', type='int',
+                    default=1000, help='Number of posts read per query'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('Usage: export_blogposts <blog slug>')
+        try:
+            blog = Blog.objects.get(slug=args[0])
+        except Blog.DoesNotExist:
+            raise CommandError('Blog "{0}" does not exist'.format(args[0]))
+
+        export = FORMATS[options['format']][0]
+        lines = export(iter_blogpost_rows(blog, options['chunk_size']))
+        if options['output'] is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'wb') as output:
+            for line in lines:
+                output.write(line)
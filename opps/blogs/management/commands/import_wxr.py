@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+import time
+from datetime import datetime
+from optparse import make_option
+from xml.etree import cElementTree as ElementTree
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models import AutoField
+from django.template.defaultfilters import slugify
+from django.utils import timezone
+
+from haystack import connections as search_connections
+from haystack.constants import DEFAULT_ALIAS as SEARCH_ALIAS
+from haystack.exceptions import NotHandled
+
+from opps.containers.models import Container
+from opps.core.tags.models import Tag
+from opps.utils.text import split_tags
+from opps.blogs.cache import (get_blog_channel, mark_blog_changed,
+                              refresh_related_blogs, delete_blog,
+                              delete_blog_categories, delete_site_blogs)
+from opps.blogs.conf import settings
+from opps.blogs.models import Blog, BlogPost, BlogPostTag, BlogLink, Category
+from opps.blogs.tasks import schedule_publish
+
+
+# Matched in order by substring, WXR 1.0, 1.1 and 1.2 only differ in the
+# version part of the uri
+NAMESPACES = (
+    ('excerpt', '/excerpt/'),
+    ('wp', 'wordpress.org/export/'),
+    ('content', '/rss/1.0/modules/content/'),
+    ('dc', '/dc/elements/'),
+)
+
+
+def local_tag(tag):
+    """'{http://wordpress.org/export/1.2/}post_name' -> 'wp:post_name'"""
+    if not tag.startswith('{'):
+        return tag
+    uri, name = tag[1:].split('}', 1)
+    for prefix, pattern in NAMESPACES:
+        if pattern in uri:
+            return '{0}:{1}'.format(prefix, name)
+    return name
+
+
+def parse_date(value):
+    """WXR *_gmt dates; drafts carry '0000-00-00 00:00:00'"""
+    try:
+        date = datetime.strptime(value or '', '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+    date = date.replace(tzinfo=timezone.utc)
+    if not settings.USE_TZ:
+        date = timezone.make_naive(date, timezone.get_default_timezone())
+    return date
+
+
+def parse_element(elem):
+    """Flatten an <item> or <wp:category> into a dict of its children,
+    with the category/post_tag terms and the postmeta pulled apart.
+    """
+    data = {'categories': [], 'tags': [], 'meta': {}}
+    for child in elem:
+        tag = local_tag(child.tag)
+        if tag == 'category':
+            if child.get('domain') == 'category':
+                data['categories'].append(child.get('nicename'))
+            elif child.get('domain') == 'post_tag' and child.text:
+                data['tags'].append(child.text.strip())
+        elif tag == 'wp:postmeta':
+            meta = dict((local_tag(m.tag), m.text) for m in child)
+            data['meta'][meta.get('wp:meta_key')] = meta.get('wp:meta_value')
+        else:
+            data[tag] = (child.text or '').strip()
+    return data
+
+
+def iter_wxr(path):
+    """Yield ('title', text), ('category', dict) and ('item', dict) from a
+    WXR file. Each child of <channel> is dropped once read, so memory stays
+    flat however many posts the export holds.
+    """
+    depth, channel = 0, None
+    for event, elem in ElementTree.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if depth == 2:
+                channel = elem
+            continue
+
+        depth -= 1
+        if depth != 2:
+            continue
+        tag = local_tag(elem.tag)
+        if tag == 'title':
+            yield 'title', (elem.text or '').strip()
+        elif tag == 'wp:category':
+            yield 'category', parse_element(elem)
+        elif tag == 'item':
+            yield 'item', parse_element(elem)
+        channel.clear()
+
+
+def bulk_insert(model, objs, fields):
+    """Multi-row INSERT of fields into the table of model only, the way
+    Model.save_base writes each table of an inherited model
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+    for start in range(0, len(objs), batch_size):
+        model._base_manager._insert(objs[start:start + batch_size],
+                                    fields=fields, using=DEFAULT_DB_ALIAS)
+
+
+class Command(BaseCommand):
+    args = '<export.xml>'
+    help = ('Import a WordPress export (WXR) into a blog: categories, '
+            'posts and custom menu links')
+    option_list = BaseCommand.option_list + (
+        make_option('--blog', dest='blog',
+                    help='Slug of the blog to import into, created when '
+                         'missing'),
+        make_option('--user', dest='user',
+                    help='Username owning the posts whose author is not '
+                         'found'),
+        make_option('--site', dest='site', type='int',
+                    default=getattr(settings, 'SITE_ID', 1)),
+        make_option('--batch-size', dest='batch_size', type='int',
+                    default=500, help='Number of posts per transaction'),
+        make_option('--no-index', dest='index', action='store_false',
+                    default=True, help='Do not update the search index'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1 or not options['blog'] or not options['user']:
+            raise CommandError('Usage: import_wxr <export.xml> --blog=<slug> '
+                               '--user=<username>')
+
+        User = get_user_model()
+        try:
+            self.site = Site.objects.get(pk=options['site'])
+            self.default_user = User.objects.get(username=options['user'])
+        except (Site.DoesNotExist, User.DoesNotExist) as e:
+            raise CommandError(e)
+        self.channel = get_blog_channel(self.site)
+        if self.channel is None:
+            raise CommandError('Create the "{0}" channel first'.format(
+                settings.OPPS_BLOGS_CHANNEL))
+
+        self.blog, created = Blog.objects.get_or_create(
+            site=self.site, slug=options['blog'],
+            defaults={'name': options['blog'], 'published': True,
+                      'type': settings.OPPS_BLOGS_TYPES[0][0]})
+        self.options = options
+        self.users = {}
+        self.ctype_id = ContentType.objects.get_for_model(
+            BlogPost, for_concrete_model=False).pk
+        self.categories = dict(
+            (slug, (pk, long_slug)) for pk, slug, long_slug in
+            Category.objects.filter(blog=self.blog).values_list(
+                'pk', 'slug', 'long_slug'))
+        self.seen = set()
+        self.total, self.skipped, self.started = 0, 0, time.time()
+
+        categories, posts, links = [], [], []
+        for kind, data in iter_wxr(args[0]):
+            # WordPress exports list categories before the items
+            if kind == 'item' and categories:
+                self.import_categories(categories)
+                categories = []
+
+            if kind == 'title':
+                # data is the channel title, a string
+                if created and data:
+                    Blog.objects.filter(pk=self.blog.pk).update(
+                        name=data[:140])
+            elif kind == 'category':
+                categories.append(data)
+            elif data.get('wp:post_type') == 'post':
+                posts.append(data)
+                if len(posts) >= options['batch_size']:
+                    self.import_posts(posts)
+                    posts = []
+            elif (data.get('wp:post_type') == 'nav_menu_item' and
+                    data['meta'].get('_menu_item_type') == 'custom'):
+                links.append(data)
+
+        self.import_categories(categories)
+        self.import_posts(posts)
+        self.import_links(links)
+
+        # What the per-row receivers would have done, once for the blog
+        Category._tree_manager.rebuild()
+        call_command('rebuild_blog_archives', blog=self.blog.slug,
+                     stdout=self.stdout)
+        delete_blog_categories(self.blog.pk)
+        delete_blog(self.blog.slug)
+        delete_site_blogs(self.site.pk)
+        mark_blog_changed(self.blog.slug)
+        mark_blog_changed(None)
+        refresh_related_blogs([self.blog.pk])
+
+        self.stdout.write('{0} posts imported, {1} skipped'.format(
+            self.total, self.skipped))
+
+    def get_user(self, username):
+        if username not in self.users:
+            users = get_user_model().objects.filter(username=username)[:1]
+            self.users[username] = users[0] if users else self.default_user
+        return self.users[username]
+
+    def import_categories(self, categories):
+        """Create the missing categories, flattened to the two levels the
+        Category admin allows. The MPTT fields are filled by the single
+        rebuild at the end of the import.
+        """
+        parents = dict((c.get('wp:category_nicename'),
+                        c.get('wp:category_parent')) for c in categories)
+
+        def root(slug):
+            seen = set()
+            while parents.get(slug) and slug not in seen:
+                seen.add(slug)
+                slug = parents[slug]
+            return slug
+
+        names = dict((c.get('wp:category_nicename'), c.get('wp:cat_name'))
+                     for c in categories)
+        levels = ([s for s in names if not parents.get(s)],
+                  [s for s in names if parents.get(s)])
+        opts = Category._mptt_meta
+        for level in levels:
+            new = []
+            for slug in level:
+                if not slug or slug in self.categories:
+                    continue
+                parent = None
+                if parents.get(slug):
+                    parent = self.categories.get(root(slug))
+                long_slug = slug if parent is None else '{0}/{1}'.format(
+                    parent[1], slug)
+                category = Category(
+                    blog=self.blog, site=self.site,
+                    site_domain=self.site.domain, site_iid=self.site.pk,
+                    name=(names[slug] or slug)[:140], slug=slug,
+                    long_slug=long_slug, published=True,
+                    parent_id=parent and parent[0])
+                for attr in (opts.left_attr, opts.right_attr,
+                             opts.tree_id_attr, opts.level_attr):
+                    setattr(category, attr, 0)
+                new.append(category)
+
+            Category.objects.bulk_create(new)
+            self.categories.update(
+                (slug, (pk, long_slug)) for pk, slug, long_slug in
+                Category.objects.filter(
+                    blog=self.blog,
+                    long_slug__in=[c.long_slug for c in new]).values_list(
+                    'pk', 'slug', 'long_slug'))
+
+    def build_post(self, item):
+        published = item.get('wp:status') in ('publish', 'future')
+        date_available = parse_date(item.get('wp:post_date_gmt'))
+        category = None
+        for nicename in item['categories']:
+            if nicename in self.categories:
+                category = self.categories[nicename]
+                break
+
+        post = BlogPost(
+            site=self.site, site_domain=self.site.domain,
+            site_iid=self.site.pk,
+            user=self.get_user(item.get('dc:creator')),
+            channel=self.channel, channel_name=self.channel.name,
+            channel_long_slug=self.channel.long_slug,
+            child_class=BlogPost.__name__, child_module=BlogPost.__module__,
+            child_app_label=BlogPost._meta.app_label,
+            polymorphic_ctype_id=self.ctype_id,
+            blog=self.blog, category_id=category and category[0],
+            title=(item.get('title') or item['slug'])[:140],
+            slug=item['slug'], tags=','.join(split_tags(','.join(
+                item['tags']))),
+            content=item.get('content:encoded', ''),
+            headline=item.get('excerpt:encoded') or None,
+            source=item.get('link') or None,
+            published=published,
+            date_available=date_available or timezone.now())
+        post.date_listed = post.date_available if published else None
+        post.path = BlogPost.make_path(self.blog.slug,
+                                       category and category[1], post.slug)
+        post.path_hash = BlogPost.hash_path(post.path)
+        return post
+
+    def import_posts(self, items):
+        """Insert a batch of posts in one transaction: Container and
+        BlogPost rows with multi-row INSERTs (bulk_create does not handle
+        inherited models), then their tags and the missing opps Tag rows
+        Tagged.save would have created. Indexing and scheduling run
+        once the batch is committed.
+        """
+        for item in items:
+            item['slug'] = (item.get('wp:post_name') or
+                            slugify(item.get('title', '')))[:150]
+        existing = set(Container.objects.filter(
+            site=self.site, channel=self.channel,
+            slug__in=[item['slug'] for item in items],
+        ).values_list('slug', flat=True))
+
+        posts = []
+        for item in items:
+            if not item['slug'] or item['slug'] in existing or \
+                    item['slug'] in self.seen:
+                self.skipped += 1
+                continue
+            self.seen.add(item['slug'])
+            posts.append(self.build_post(item))
+        if not posts:
+            return
+
+        with transaction.commit_on_success():
+            bulk_insert(Container, posts,
+                        [f for f in Container._meta.local_fields
+                         if not isinstance(f, AutoField)])
+            ids = dict(Container.objects.filter(
+                site=self.site, channel=self.channel,
+                slug__in=[post.slug for post in posts],
+            ).values_list('slug', 'pk'))
+            for post in posts:
+                post.id = post.container_ptr_id = ids[post.slug]
+            bulk_insert(BlogPost, posts, BlogPost._meta.local_fields)
+
+            BlogPostTag.objects.bulk_create([
+                BlogPostTag(blogpost_id=post.pk, name=name, slug=slug)
+                for post in posts
+                for slug, name in BlogPostTag.objects.parse(
+                    post.tags).items()])
+            self.import_tags(posts)
+
+        if self.options['index']:
+            self.index_posts([post.pk for post in posts])
+        now = timezone.now()
+        for post in posts:
+            if post.date_listed and post.date_listed > now:
+                schedule_publish(post.pk, post.date_listed)
+
+        self.total += len(posts)
+        self.stdout.write('{0} posts imported ({1:.1f} posts/s)'.format(
+            self.total, self.total / max(time.time() - self.started, 1e-3)))
+
+    def import_tags(self, posts):
+        """Create the Tag rows of the tags of posts that are missing"""
+        names = list(set(name for post in posts
+                         for name in split_tags(post.tags)))
+        existing = set()
+        for start in range(0, len(names), 500):
+            existing.update(Tag.objects.filter(
+                name__in=names[start:start + 500]).values_list(
+                'name', flat=True))
+        Tag.objects.bulk_create([Tag(name=name, slug=slugify(name))
+                                 for name in names if name not in existing])
+
+    def index_posts(self, pks):
+        connection = search_connections[SEARCH_ALIAS]
+        try:
+            index = connection.get_unified_index().get_index(BlogPost)
+        except NotHandled:
+            return
+        connection.get_backend().update(
+            index, index.index_queryset().filter(pk__in=pks))
+
+    def import_links(self, items):
+        existing = set(BlogLink.objects.filter(
+            blog=self.blog).values_list('link', flat=True))
+        links = []
+        for item in items:
+            url = item['meta'].get('_menu_item_url')
+            if not url or url in existing:
+                continue
+            existing.add(url)
+            links.append(BlogLink(
+                blog=self.blog, site=self.site,
+                site_domain=self.site.domain, site_iid=self.site.pk,
+                name=(item.get('title') or url)[:140], link=url,
+                published=True))
+        BlogLink.objects.bulk_create(links)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from opps.blogs.models import Blog, BlogPost, BlogArchive
+from opps.blogs.managers import month_of
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the BlogArchive month counts from the blog posts'
+    option_list = BaseCommand.option_list + (
+        make_option('--blog', dest='blog', default=None,
+                    help='Only rebuild the blog with this slug'),
+    )
+
+    def handle(self, *args, **options):
+        blogs = Blog.objects.order_by('pk')
+        if options['blog']:
+            blogs = blogs.filter(slug=options['blog'])
+
+        for blog in blogs.iterator():
+            counts = defaultdict(int)
+            dates = BlogPost.objects.filter(
+                blog=blog, date_listed__lte=timezone.now(),
+            ).order_by().values_list('date_listed', flat=True)
+            for date_listed in dates.iterator():
+                counts[month_of(date_listed)] += 1
+
+            with transaction.commit_on_success():
+                BlogArchive.objects.filter(blog=blog).delete()
+                BlogArchive.objects.bulk_create([
+                    BlogArchive(blog=blog, year=year, month=month,
+                                count=count)
+                    for (year, month), count in counts.items()
+                ])
+
+            self.stdout.write('{0}: {1} months'.format(blog.slug,
+                                                       len(counts)))
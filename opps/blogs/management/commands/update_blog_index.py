@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from haystack import connections
+from haystack.constants import DEFAULT_ALIAS
+from haystack.exceptions import NotHandled
+
+from opps.blogs.models import BlogPost, BlogPostIndexQueue
+
+
+class Command(BaseCommand):
+    help = ('Write the queued blog post index updates and deletes to the '
+            'search backend. To reindex the posts updated in the last N '
+            'hours, use haystack\'s "update_index blogs --age=N".')
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', dest='batch_size', type='int',
+                    default=500, help='Number of posts per backend write'),
+        make_option('--using', dest='using', default=DEFAULT_ALIAS,
+                    help='Haystack connection to write to'),
+    )
+
+    def handle(self, *args, **options):
+        connection = connections[options['using']]
+        try:
+            self.index = connection.get_unified_index().get_index(BlogPost)
+        except NotHandled:
+            raise CommandError('BlogPost is not indexed')
+        self.backend = connection.get_backend()
+        self.using = options['using']
+        self.batch_size = options['batch_size']
+        self.drain()
+
+    def drain(self):
+        total = 0
+        while True:
+            entries = list(BlogPostIndexQueue.objects.order_by('pk').values_list(
+                'pk', 'blogpost_id', 'remove')[:self.batch_size])
+            if not entries:
+                break
+
+            # The latest entry of each post wins
+            remove = dict((blogpost_id, flag)
+                          for pk, blogpost_id, flag in entries)
+            posts = list(self.index.index_queryset(self.using).filter(
+                pk__in=[pk for pk, flag in remove.items() if not flag]))
+            if posts:
+                self.backend.update(self.index, posts)
+
+            # Deleted, unpublished or not available yet
+            indexed = set(post.pk for post in posts)
+            opts = BlogPost._meta
+            for pk in remove:
+                if pk not in indexed:
+                    self.backend.remove('{0}.{1}.{2}'.format(
+                        opts.app_label, opts.module_name, pk))
+
+            BlogPostIndexQueue.objects.filter(
+                pk__in=[pk for pk, blogpost_id, flag in entries]).delete()
+            total += len(remove)
+            self.stdout.write('{0} posts written'.format(total))
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from opps.blogs.models import BlogPost, BlogPostTag
+
+
+class Command(BaseCommand):
+    help = 'Backfill the BlogPostTag table from BlogPost.tags'
+    option_list = BaseCommand.option_list + (
+        make_option('--blog', dest='blog', default=None,
+                    help='Only update the posts of the blog with this slug'),
+        make_option('--chunk-size', dest='chunk_size', type='int',
+                    default=1000, help='Number of posts per transaction'),
+    )
+
+    def handle(self, *args, **options):
+        posts = BlogPost.objects.by_pk()
+        if options['blog']:
+            posts = posts.filter(blog__slug=options['blog'])
+
+        last_pk, total = 0, 0
+        while True:
+            chunk = list(posts.filter(pk__gt=last_pk).values_list(
+                'pk', 'tags')[:options['chunk_size']])
+            if not chunk:
+                break
+
+            with transaction.commit_on_success():
+                for pk, tags in chunk:
+                    BlogPostTag.objects.sync(pk, tags)
+
+            last_pk = chunk[-1][0]
+            total += len(chunk)
+            self.stdout.write('{0} posts updated'.format(total))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from opps.blogs.cache import mark_blog_changed
+from opps.blogs.models import Blog, BlogPost, BlogPostRelated
+from opps.blogs.related import (post_terms, tfidf_vectors, build_postings,
+                                nearest)
+
+
+class Command(BaseCommand):
+    help = ('Store the most similar posts of each blog post, by TF-IDF of '
+            'title, headline, tags and category, as automatic related '
+            'entries next to the curated ones')
+    option_list = BaseCommand.option_list + (
+        make_option('--blog', dest='blog', default=None,
+                    help='Only update the posts of the blog with this slug'),
+        make_option('--top', dest='top', type='int', default=5,
+                    help='Number of related posts per post'),
+        make_option('--all', dest='all', action='store_true', default=False,
+                    help='Recompute every post, not only the posts '
+                         'without automatic entries'),
+        make_option('--chunk-size', dest='chunk_size', type='int',
+                    default=500, help='Number of posts per transaction'),
+    )
+
+    def handle(self, *args, **options):
+        blogs = Blog.objects.order_by('pk')
+        if options['blog']:
+            blogs = blogs.filter(slug=options['blog'])
+
+        for blog in blogs.iterator():
+            rows = BlogPost.objects.filter(
+                blog=blog, date_listed__isnull=False,
+            ).order_by().values_list('pk', 'title', 'headline', 'tags',
+                                     'category__long_slug')
+            documents = dict((row[0], post_terms(*row[1:]))
+                             for row in rows.iterator())
+
+            targets = set(documents)
+            if not options['all']:
+                targets.difference_update(BlogPostRelated.objects.filter(
+                    blogpost__blog=blog, automatic=True,
+                ).values_list('blogpost', flat=True))
+            if len(documents) < 2 or not targets:
+                continue
+
+            vectors = tfidf_vectors(documents)
+            # Once per blog, the chunks below all search the whole blog
+            postings = build_postings(vectors)
+            targets = sorted(targets)
+            for start in range(0, len(targets), options['chunk_size']):
+                self.store(targets[start:start + options['chunk_size']],
+                           vectors, postings, options['top'])
+            # The post pages show their related posts
+            mark_blog_changed(blog.slug)
+            self.stdout.write('{0}: {1} posts updated'.format(blog.slug,
+                                                              len(targets)))
+
+    def store(self, targets, vectors, postings, top):
+        """Replace the automatic entries of targets, skipping the posts
+        already curated as related
+        """
+        curated = defaultdict(set)
+        for blogpost, related in BlogPostRelated.objects.filter(
+                blogpost__in=targets, automatic=False,
+        ).values_list('blogpost', 'related'):
+            curated[blogpost].add(related)
+
+        rows = []
+        neighbours = nearest(vectors, postings, targets,
+                             top + max([len(c) for c in curated.values()] or
+                                       [0]))
+        for target in targets:
+            found = [(score, pk) for score, pk in neighbours[target]
+                     if pk not in curated[target]][:top]
+            rows.extend(BlogPostRelated(blogpost_id=target, related_id=pk,
+                                        order=rank, score=score,
+                                        automatic=True)
+                        for rank, (score, pk) in enumerate(found))
+
+        with transaction.commit_on_success():
+            BlogPostRelated.objects.filter(blogpost__in=targets,
+                                           automatic=True).delete()
+            BlogPostRelated.objects.bulk_create(rows)
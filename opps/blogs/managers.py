@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from django.db import models, connections, transaction
+from django.db.models import get_model
+from django.core.cache import cache
+from django.template.defaultfilters import slugify
+from django.utils import timezone
+
+from opps.core.managers import PublishableManager
+from opps.containers.managers import ContainerManager, ContainerQuerySet
+from opps.utils.text import split_tags
+
+from .cache import _cache_key, mark_blog_changed, refresh_related_blogs
+from .conf import settings
+from .tasks import schedule_publish
+
+
+def month_range(year, month):
+    """Half-open [start, end) datetimes of a month, in the default time
+    zone. Raises ValueError for an invalid month.
+    """
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    if settings.USE_TZ:
+        tz = timezone.get_default_timezone()
+        start = timezone.make_aware(start, tz)
+        end = timezone.make_aware(end, tz)
+    return start, end
+
+
+def month_of(value):
+    """(year, month) bucket of a datetime, in the default time zone"""
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.localtime(value, timezone.get_default_timezone())
+    return value.year, value.month
+
+
+class BlogManager(PublishableManager):
+
+    def get_by_slug(self, slug, **filters):
+        """Return the blog with the given slug, cached across requests.
+
+        filters are plain field values (e.g. published=True) checked
+        against the cached object; Blog.DoesNotExist is raised when the
+        blog does not exist or does not match them.
+        """
+        cachekey = _cache_key('blog', slug)
+        blog = cache.get(cachekey)
+        if blog is None:
+            blog = self.get_query_set().get(slug=slug)
+            cache.set(cachekey, blog, settings.OPPS_BLOGS_CACHE_EXPIRE)
+
+        for field, value in filters.items():
+            if getattr(blog, field) != value:
+                raise self.model.DoesNotExist(
+                    'Blog matching query does not exist.')
+        return blog
+
+
+class BlogPostQuerySet(ContainerQuerySet):
+
+    def listed(self):
+        """Published posts already available, newest first. Filters and
+        orders on date_listed so the (blog, ..., date_listed) indexes
+        serve both the WHERE and the ORDER BY.
+        """
+        return self.filter(date_listed__lte=timezone.now()).newest_first()
+
+    # The pk of a post is container_ptr, a relation: order_by('pk') would
+    # follow Container's Meta.ordering (date_available), hence the
+    # container_ptr__id below.
+    def newest_first(self):
+        """Newest date_listed first, then newest post"""
+        return self.order_by('-date_listed', '-container_ptr__id')
+
+    def by_pk(self):
+        """Oldest primary key first, for primary key chunks"""
+        return self.order_by('container_ptr__id')
+
+    def for_list(self, *related):
+        """Load what get_absolute_url and the list templates read
+        (blog, category, main image, plus any extra related) in the same
+        query and leave the post body out, so a page costs a fixed number
+        of queries. Django 1.5 select_related() replaces, not extends,
+        the previous call, hence the extra arguments.
+        """
+        return self.select_related(
+            'blog', 'category', 'main_image', *related).defer('content')
+
+    def update_paths(self):
+        """Recompute the stored path of the posts in this queryset, after
+        their blog slug or category long_slug changed, with one SELECT
+        and one batched UPDATE. Returns the number of paths changed.
+        """
+        rows = self.order_by().values_list(
+            'pk', 'path', 'blog__slug', 'category__long_slug', 'slug')
+        changed = []
+        for pk, path, blog_slug, long_slug, slug in rows.iterator():
+            new_path = self.model.make_path(blog_slug, long_slug, slug)
+            if new_path != path:
+                changed.append((new_path, self.model.hash_path(new_path),
+                                pk))
+
+        if changed:
+            connection = connections[self.db]
+            qn = connection.ops.quote_name
+            opts = self.model._meta
+            cursor = connection.cursor()
+            cursor.executemany(
+                'UPDATE {0} SET {1} = %s, {2} = %s WHERE {3} = %s'.format(
+                    qn(opts.db_table), qn(opts.get_field('path').column),
+                    qn(opts.get_field('path_hash').column),
+                    qn(opts.pk.column)),
+                changed)
+            transaction.commit_unless_managed(using=self.db)
+        return len(changed)
+
+    def _copy_date_listed(self, pks):
+        """date_listed = date_available for pks in one UPDATE; the two
+        columns live on different tables, out of reach of F()
+        """
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        opts = self.model._meta
+        parent = opts.pk.rel.to._meta
+        connection.cursor().execute(
+            'UPDATE {0} SET {1} = (SELECT {2} FROM {3} WHERE {3}.{4} = '
+            '{0}.{5}) WHERE {5} IN ({6})'.format(
+                qn(opts.db_table), qn(opts.get_field('date_listed').column),
+                qn(parent.get_field('date_available').column),
+                qn(parent.db_table), qn(parent.pk.column),
+                qn(opts.pk.column), ', '.join(['%s'] * len(pks))),
+            pks)
+
+    def change(self, **fields):
+        """Set fields (published, blog, category) on every post of this
+        queryset with set-based UPDATEs in one transaction, instead of a
+        save() and its receivers per post. date_listed and path follow,
+        then the archives, schedule and cache markers of each blog
+        touched are refreshed once. Returns the number of posts changed.
+        """
+        pks = list(self.values_list('pk', flat=True))
+        if not pks:
+            return 0
+        posts = self.model.objects.filter(pk__in=pks)
+        before = set(posts.values_list('blog', 'date_listed'))
+
+        with transaction.commit_on_success(using=self.db):
+            # update() skips auto_now, date_update is set by hand
+            posts.update(date_update=timezone.now(), **fields)
+            if fields.get('published'):
+                self._copy_date_listed(pks)
+            elif 'published' in fields:
+                posts.update(date_listed=None)
+            if 'blog' in fields or 'category' in fields:
+                posts.update_paths()
+
+        after = set(posts.values_list('blog', 'date_listed'))
+        buckets = set((blog_id,) + month_of(date_listed)
+                      for blog_id, date_listed in before | after
+                      if date_listed)
+        for blog_id, year, month in buckets:
+            get_model('blogs', 'BlogArchive').objects.refresh(
+                blog_id, year, month)
+
+        now = timezone.now()
+        if fields.get('published'):
+            for pk, date_listed in posts.filter(
+                    date_listed__gt=now).values_list('pk', 'date_listed'):
+                schedule_publish(pk, date_listed)
+
+        if settings.OPPS_BLOGS_INDEX_QUEUE:
+            get_model('blogs', 'BlogPostIndexQueue').objects.enqueue(pks)
+        blog_ids = set(blog_id for blog_id, _ in before | after)
+        for slug in get_model('blogs', 'Blog').objects.filter(
+                pk__in=blog_ids).values_list('slug', flat=True):
+            mark_blog_changed(slug)
+        mark_blog_changed(None)
+        refresh_related_blogs(blog_ids)
+        return len(pks)
+
+
+class BlogPostManager(ContainerManager):
+    queryset_class = BlogPostQuerySet
+
+    def listed(self):
+        return self.get_query_set().listed()
+
+    def for_list(self, *related):
+        return self.get_query_set().for_list(*related)
+
+    def by_pk(self):
+        return self.get_query_set().by_pk()
+
+
+class BlogPostTagManager(models.Manager):
+
+    def parse(self, tags):
+        """{slug: name} of comma-separated tags, the slugs cut to fit
+        the slug column
+        """
+        max_length = self.model._meta.get_field('slug').max_length
+        wanted = {}
+        for name in split_tags(tags):
+            slug = slugify(name)[:max_length]
+            if slug and slug not in wanted:
+                wanted[slug] = name
+        return wanted
+
+    def sync(self, blogpost_id, tags):
+        """Make the rows of blogpost_id match its comma-separated tags"""
+        wanted = self.parse(tags)
+
+        rows = self.filter(blogpost_id=blogpost_id)
+        existing = set(rows.values_list('slug', flat=True))
+        stale = existing.difference(wanted)
+        if stale:
+            rows.filter(slug__in=stale).delete()
+
+        self.bulk_create([
+            self.model(blogpost_id=blogpost_id, slug=slug, name=name)
+            for slug, name in wanted.items() if slug not in existing
+        ])
+
+
+class BlogPostIndexQueueManager(models.Manager):
+
+    def enqueue(self, blogpost_ids, remove=False):
+        """Queue a search index write of each post, one INSERT in all"""
+        self.bulk_create([self.model(blogpost_id=pk, remove=remove)
+                          for pk in blogpost_ids])
+
+
+class BlogArchiveManager(models.Manager):
+
+    def refresh(self, blog_id, year, month):
+        """Recount the posts of blog_id listed in the given month with an
+        indexed range COUNT and store it, dropping empty months. Scheduled
+        posts count once live, publish_scheduled_blogpost recounts then.
+        """
+        start, end = month_range(year, month)
+        count = get_model('blogs', 'BlogPost').objects.filter(
+            blog=blog_id, date_listed__gte=start, date_listed__lt=end,
+            date_listed__lte=timezone.now(),
+        ).count()
+
+        archives = self.filter(blog=blog_id, year=year, month=month)
+        if not count:
+            archives.delete()
+        elif not archives.update(count=count):
+            self.create(blog_id=blog_id, year=year, month=month, count=count)
@@ -2,22 +2,44 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import hashlib
+
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models import Q
+from django.db.models.signals import (pre_save, post_save, pre_delete,
+                                      post_delete, m2m_changed)
 from django.dispatch import receiver
 from django.db.models import get_model
+from django.template.defaultfilters import slugify
+from django.utils import timezone
+from django.utils.encoding import force_bytes
 from django.utils.translation import ugettext_lazy as _
 from django.core.exceptions import ImproperlyConfigured
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 
 from mptt.models import MPTTModel, TreeForeignKey
+try:
+    from mptt.signals import node_moved
+except ImportError:  # django-mptt < 0.7
+    node_moved = None
 
 from opps.core.models import NotUserPublishable, Slugged
 from opps.articles.models import Article
 from opps.images.models import Image
 from opps.multimedias.models import Audio, Video
-
+from opps.channels.models import Channel
+
+from .cache import (delete_blog_channel, delete_blog,
+                    get_blog_authors, delete_blog_authors,
+                    delete_user_blogs, mark_blog_changed,
+                    get_blog_categories, delete_blog_categories,
+                    get_blog_related, delete_blog_related,
+                    refresh_related_blogs, delete_site_blogs)
 from .conf import settings
+from .tasks import schedule_publish
+from .managers import (BlogManager, BlogPostManager, BlogPostTagManager,
+                       BlogArchiveManager, BlogPostIndexQueueManager,
+                       month_of)
 
 
 class Category(MPTTModel, NotUserPublishable, Slugged):
@@ -136,6 +158,8 @@ class Blog(NotUserPublishable, Slugged):
         verbose_name=_('External'),
         default=False)
 
+    objects = BlogManager()
+
     def __unicode__(self):
         return self.name
 
@@ -164,6 +188,9 @@ class Blog(NotUserPublishable, Slugged):
     def get_links(self):
         return self.links.filter(published=True)
 
+    def get_authors(self):
+        return get_blog_authors(self)
+
     def get_latest(self):
         try:
             return self.blogpost_set.latest()
@@ -171,10 +198,30 @@ class Blog(NotUserPublishable, Slugged):
             return None
 
     def get_categories(self):
-        return self.categories.filter(published=True)
+        return get_blog_categories(self)
 
     def get_menu_categories(self):
-        return self.categories.filter(published=True, show_in_menu=True)
+        return [category for category in get_blog_categories(self)
+                if category.show_in_menu]
+
+    def get_category_tree(self):
+        """Top level published categories, subcategories in .children"""
+        categories = get_blog_categories(self)
+        published = set(category.pk for category in categories)
+        return [category for category in categories
+                if category.parent_id not in published]
+
+    def get_related_block(self):
+        """Related blogs, with their latest post, and related channels"""
+        return get_blog_related(self)
+
+    def get_archives(self):
+        """Months with posts, newest first, read from BlogArchive. Months
+        after the current one only hold scheduled posts and are left out.
+        """
+        year, month = month_of(timezone.now())
+        return self.archives.filter(
+            Q(year__lt=year) | Q(year=year, month__lte=month))
 
     class Meta:
         verbose_name = _('Blog')
@@ -248,21 +295,66 @@ class BlogPost(Article):
         through='blogs.BlogPostRelated',
     )
 
+    # date_available of published posts, NULL otherwise. It lives on this
+    # table (not on Container) so listings can use the blog indexes.
+    date_listed = models.DateTimeField(_('Date listed'), null=True,
+                                       editable=False)
+    # blog slug (150) / category long_slug (250) / slug (150), kept in sync
+    # by save() and by the Blog and Category receivers below
+    path = models.CharField(_('Path'), max_length=552, editable=False)
+    # A unique key on path would pass the 767 bytes of a MySQL index
+    path_hash = models.CharField(_('Path hash'), max_length=40,
+                                 editable=False)
+
+    objects = BlogPostManager()
+
     class Meta:
         ordering = ['-date_available']
         verbose_name = _('Blog post')
         verbose_name_plural = _('Blog Posts')
         get_latest_by = 'date_available'
+        index_together = [
+            ('blog', 'date_listed', 'container_ptr'),
+            ('blog', 'category', 'date_listed', 'container_ptr'),
+        ]
+        unique_together = ('blog', 'path_hash')
+
+    @staticmethod
+    def make_path(blog_slug, category_long_slug, slug):
+        return "{}/{}/{}".format(blog_slug,
+                                 category_long_slug or 'sem-categoria', slug)
+
+    @staticmethod
+    def hash_path(path):
+        return hashlib.sha1(force_bytes(path)).hexdigest()
+
+    def _make_path(self):
+        long_slug = self.category.long_slug if self.category_id else None
+        return self.make_path(self.blog.slug, long_slug, self.slug)
+
+    def save(self, *args, **kwargs):
+        self.date_listed = self.date_available if self.published else None
+        # Container.save fills an empty slug too, but only after
+        # Slugged.save has compared the old and new urls
+        if not self.slug:
+            self.slug = slugify(self.title)
+        self.path = self._make_path()
+        self.path_hash = self.hash_path(self.path)
+        super(BlogPost, self).save(*args, **kwargs)
 
     def get_absolute_url(self):
-        try:
-            category = self.category
-            slug = category.long_slug
-        except AttributeError:
-            slug = 'sem-categoria'
+        return "/{}/{}.html".format(settings.OPPS_BLOGS_CHANNEL,
+                                    self.path or self._make_path())
 
-        return "/{}/{}/{}/{}.html".format(settings.OPPS_BLOGS_CHANNEL,
-                                          self.blog.slug, slug, self.slug)
+    def get_related_posts(self):
+        """Published related posts, the curated ones first, then the
+        precomputed ones by score, in a single query
+        """
+        return [related.related for related in
+                BlogPostRelated.objects.filter(
+                    blogpost=self, related__published=True,
+                    related__date_available__lte=timezone.now(),
+                ).select_related('related').order_by('automatic', 'order')]
 
 
 class BlogPostRelated(models.Model):
@@ -283,6 +375,12 @@ class BlogPostRelated(models.Model):
         on_delete=models.SET_NULL
     )
     order = models.PositiveIntegerField(_('Order'), default=0)
+    # Set on the rows written by update_related_blogposts, which replaces
+    # them on each run and leaves the curated ones alone
+    automatic = models.BooleanField(_('Automatic'), default=False,
+                                    editable=False)
+    score = models.FloatField(_('Score'), null=True, blank=True,
+                              editable=False)
 
     class Meta:
         verbose_name = _('Related content')
@@ -295,6 +393,74 @@ class BlogPostRelated(models.Model):
         return None
 
 
+class BlogPostTag(models.Model):
+    """Normalized copy of BlogPost.tags, one row per tag slug, so tag
+    pages are an indexed join instead of a LIKE scan.
+    """
+    blogpost = models.ForeignKey('blogs.BlogPost', verbose_name=_('Blog post'),
+                                 related_name='blogposttags')
+    name = models.CharField(_('Name'), max_length=255)
+    # (slug, blogpost) has to fit the 767 bytes key limit of MySQL/InnoDB
+    slug = models.SlugField(_('Slug'), max_length=150)
+
+    objects = BlogPostTagManager()
+
+    class Meta:
+        unique_together = ('slug', 'blogpost')
+        verbose_name = _('Blog post tag')
+        verbose_name_plural = _('Blog post tags')
+
+    def __unicode__(self):
+        return self.name
+
+
+class BlogArchive(models.Model):
+    """Number of listed posts of a blog per month, kept current by the
+    BlogPost receivers so archive widgets never GROUP BY the posts.
+    """
+    blog = models.ForeignKey('blogs.Blog', verbose_name=_('Blog'),
+                             related_name='archives')
+    year = models.PositiveSmallIntegerField(_('Year'))
+    month = models.PositiveSmallIntegerField(_('Month'))
+    count = models.PositiveIntegerField(_('Count'), default=0)
+
+    objects = BlogArchiveManager()
+
+    class Meta:
+        unique_together = ('blog', 'year', 'month')
+        ordering = ('-year', '-month')
+        verbose_name = _('Blog archive')
+        verbose_name_plural = _('Blog archives')
+
+    def __unicode__(self):
+        return "{}/{:02d}".format(self.year, self.month)
+
+    def get_absolute_url(self):
+        return "/{}/{}/{}/{}/".format(settings.OPPS_BLOGS_CHANNEL,
+                                      self.blog.slug, self.year, self.month)
+
+
+class BlogPostIndexQueue(models.Model):
+    """Search index write pending for a blog post, queued on save and
+    delete when OPPS_BLOGS_INDEX_QUEUE is on and drained in batches by
+    the update_blog_index command.
+    """
+    # Not a foreign key, deletes are queued too
+    blogpost_id = models.PositiveIntegerField(_('Blog post'), db_index=True)
+    remove = models.BooleanField(_('Remove'), default=False)
+    date_insert = models.DateTimeField(_('Date insert'), auto_now_add=True)
+
+    objects = BlogPostIndexQueueManager()
+
+    class Meta:
+        verbose_name = _('Blog post index queue')
+        verbose_name_plural = _('Blog post index queue')
+
+    def __unicode__(self):
+        return "{}:{}".format('remove' if self.remove else 'update',
+                              self.blogpost_id)
+
+
 class BlogLink(NotUserPublishable):
     blog = models.ForeignKey('blogs.Blog', related_name='links')
     name = models.CharField(_("Name"), max_length=140)
@@ -348,3 +514,188 @@ def create_blog_profile(sender, **kwargs):
     instance = kwargs.get('instance')
     Profile = get_model(app_label, model_name)
     Profile.objects.create(blog=instance)
+
+
+@receiver(post_save, sender=Channel)
+@receiver(post_delete, sender=Channel)
+def invalidate_blog_channel(sender, instance, **kwargs):
+    delete_blog_channel(instance.site_id)
+    for pk, slug in Blog.objects.filter(
+            blogchannelrelated__related=instance).values_list('pk', 'slug'):
+        delete_blog_related(pk)
+        mark_blog_changed(slug)
+
+
+@receiver(pre_save, sender=Blog)
+def track_blog_slug(sender, instance, **kwargs):
+    instance._old_slug = None
+    if instance.pk:
+        old_slug = sender.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True)[:1]
+        instance._old_slug = old_slug[0] if old_slug else None
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_delete, sender=Blog)
+def invalidate_blog(sender, instance, **kwargs):
+    delete_blog(instance.slug)
+    delete_blog_categories(instance.pk)
+    delete_blog_related(instance.pk)
+    delete_site_blogs(instance.site_id)
+    refresh_related_blogs([instance.pk])
+    mark_blog_changed(instance.slug)
+    mark_blog_changed(None)
+    old_slug = getattr(instance, '_old_slug', None)
+    if old_slug and old_slug != instance.slug:
+        delete_blog(old_slug)
+        mark_blog_changed(old_slug)
+
+
+@receiver(post_save, sender=Blog)
+@receiver(pre_delete, sender=Blog)
+def invalidate_blog_members(sender, instance, **kwargs):
+    # pre_delete: the membership rows are gone by post_delete
+    delete_user_blogs(*instance.user.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Blog)
+def invalidate_related_blocks(sender, instance, **kwargs):
+    # The BlogRelated rows pointing to it are nulled before post_delete
+    refresh_related_blogs([instance.pk])
+
+
+@receiver(post_save, sender=Blog)
+def update_blog_paths(sender, instance, created, **kwargs):
+    old_slug = getattr(instance, '_old_slug', None)
+    if old_slug and old_slug != instance.slug:
+        BlogPost.objects.filter(blog=instance).update_paths()
+
+
+@receiver(pre_save, sender=Category)
+def track_category_long_slug(sender, instance, **kwargs):
+    instance._old_long_slug = None
+    if instance.pk:
+        old_long_slug = sender.objects.filter(
+            pk=instance.pk).values_list('long_slug', flat=True)[:1]
+        instance._old_long_slug = old_long_slug[0] if old_long_slug else None
+
+
+@receiver(post_save, sender=Category)
+def update_category_paths(sender, instance, created, **kwargs):
+    old_long_slug = getattr(instance, '_old_long_slug', None)
+    if old_long_slug and old_long_slug != instance.long_slug:
+        BlogPost.objects.filter(category=instance).update_paths()
+
+
+@receiver(pre_save, sender=BlogPost)
+def track_blogpost_listing(sender, instance, **kwargs):
+    instance._old_listing = None
+    if instance.pk:
+        old_listing = sender.objects.filter(pk=instance.pk).values_list(
+            'blog', 'date_listed')[:1]
+        instance._old_listing = old_listing[0] if old_listing else None
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def refresh_blog_archives(sender, instance, **kwargs):
+    # Recount the month the post is in and, after a save that moved it,
+    # the month it left
+    buckets = set()
+    if instance.date_listed:
+        buckets.add((instance.blog_id,) + month_of(instance.date_listed))
+    old_listing = getattr(instance, '_old_listing', None)
+    if old_listing and old_listing[1]:
+        buckets.add((old_listing[0],) + month_of(old_listing[1]))
+    for blog_id, year, month in buckets:
+        BlogArchive.objects.refresh(blog_id, year, month)
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def invalidate_blog_post(sender, instance, **kwargs):
+    blog_ids = set([instance.blog_id])
+    old_listing = getattr(instance, '_old_listing', None)
+    if old_listing:
+        blog_ids.add(old_listing[0])
+    for slug in Blog.objects.filter(
+            pk__in=blog_ids).values_list('slug', flat=True):
+        mark_blog_changed(slug)
+    mark_blog_changed(None)
+    refresh_related_blogs(blog_ids)
+
+
+@receiver(post_save, sender=BlogPost)
+def schedule_blogpost(sender, instance, **kwargs):
+    old_listing = getattr(instance, '_old_listing', None)
+    if old_listing and old_listing[1] == instance.date_listed:
+        # Already queued by the save that set this date
+        return
+    if instance.date_listed and instance.date_listed > timezone.now():
+        schedule_publish(instance.pk, instance.date_listed)
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def queue_blogpost_index(sender, instance, signal, **kwargs):
+    if settings.OPPS_BLOGS_INDEX_QUEUE:
+        BlogPostIndexQueue.objects.enqueue([instance.pk],
+                                           remove=signal is post_delete)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=BlogLink)
+@receiver(post_delete, sender=BlogLink)
+def invalidate_blog_menus(sender, instance, **kwargs):
+    if sender is Category:
+        delete_blog_categories(instance.blog_id)
+    for slug in Blog.objects.filter(
+            pk=instance.blog_id).values_list('slug', flat=True):
+        mark_blog_changed(slug)
+
+
+if node_moved is not None:
+    node_moved.connect(invalidate_blog_menus, sender=Category)
+
+
+@receiver(post_save, sender=BlogRelated)
+@receiver(post_delete, sender=BlogRelated)
+@receiver(post_save, sender=BlogChannelRelated)
+@receiver(post_delete, sender=BlogChannelRelated)
+def invalidate_blog_related(sender, instance, **kwargs):
+    delete_blog_related(instance.blog_id)
+    for slug in Blog.objects.filter(
+            pk=instance.blog_id).values_list('slug', flat=True):
+        mark_blog_changed(slug)
+
+
+@receiver(post_save, sender=BlogPost)
+def sync_blogpost_tags(sender, instance, **kwargs):
+    BlogPostTag.objects.sync(instance.pk, instance.tags)
+
+
+@receiver(m2m_changed, sender=Blog.user.through)
+def invalidate_blog_users(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    if not reverse:
+        if action == 'pre_clear':
+            delete_user_blogs(*instance.user.values_list('pk', flat=True))
+        elif action in ('post_add', 'post_remove'):
+            delete_user_blogs(*pk_set)
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            delete_blog_authors(instance.pk)
+            mark_blog_changed(instance.slug)
+        return
+
+    # instance is a user; a clear from its side does not send pk_set
+    if action in ('pre_clear', 'post_add', 'post_remove'):
+        delete_user_blogs(instance.pk)
+    if action == 'pre_clear':
+        pk_set = instance.blog_set.values_list('pk', flat=True)
+    elif action not in ('post_add', 'post_remove'):
+        return
+    for blog_id, slug in Blog.objects.filter(
+            pk__in=list(pk_set)).values_list('pk', 'slug'):
+        delete_blog_authors(blog_id)
+        mark_blog_changed(slug)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import base64
+import calendar
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from .conf import settings
+
+
+def encode_cursor(obj):
+    """Opaque, URL safe cursor for the (date_listed, pk) position of obj"""
+    date = obj.date_listed
+    if timezone.is_aware(date):
+        date = timezone.make_naive(date, timezone.utc)
+    micro = calendar.timegm(date.timetuple()) * 10 ** 6 + date.microsecond
+    return base64.urlsafe_b64encode(
+        '{0}.{1}'.format(micro, obj.pk).encode('ascii')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for invalid cursors"""
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        micro, pk = [int(i) for i in value.decode('ascii').split('.')]
+        date = datetime(1970, 1, 1) + timedelta(microseconds=micro)
+    except (TypeError, UnicodeError, AttributeError, ValueError,
+            OverflowError):
+        raise ValueError('Invalid cursor {0!r}'.format(cursor))
+
+    if settings.USE_TZ:
+        date = timezone.make_aware(date, timezone.utc)
+    return date, pk
+
+
+class CursorPage(object):
+    """Page of a keyset pagination, mimics django.core.paginator.Page"""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+
+
+def paginate_by_cursor(queryset, per_page, after=None, before=None):
+    """Return the CursorPage of queryset after (or before) the given
+    cursor, newest first. Keyed on (date_listed, pk), so every page is an
+    index range scan instead of an OFFSET.
+    """
+    queryset = queryset.filter(date_listed__isnull=False).newest_first()
+
+    if before:
+        date, pk = decode_cursor(before)
+        object_list = list(queryset.filter(date_listed__gte=date).exclude(
+            date_listed=date, pk__lte=pk).reverse()[:per_page + 1])
+        has_previous = len(object_list) > per_page
+        return CursorPage(object_list[:per_page][::-1], True, has_previous)
+
+    if after:
+        date, pk = decode_cursor(after)
+        queryset = queryset.filter(date_listed__lte=date).exclude(
+            date_listed=date, pk__gte=pk)
+    object_list = list(queryset[:per_page + 1])
+    has_next = len(object_list) > per_page
+    return CursorPage(object_list[:per_page], has_next, bool(after))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import heapq
+import math
+import re
+from collections import defaultdict
+
+from django.utils.html import strip_tags
+
+from opps.utils.text import split_tags
+
+
+WORD = re.compile(r'\w{3,}', re.UNICODE)
+
+
+def post_terms(title, headline, tags, category):
+    """Term counts of a post: the words of its title and headline, plus
+    one term per tag and one for its category, kept apart from the words
+    """
+    terms = defaultdict(int)
+    for text in (title, headline):
+        for word in WORD.findall(strip_tags(text or '').lower()):
+            terms[word] += 1
+    for tag in split_tags(tags or ''):
+        terms[u'tag:{0}'.format(tag.lower())] += 1
+    if category:
+        terms[u'category:{0}'.format(category)] += 1
+    return terms
+
+
+def tfidf_vectors(documents, max_df=0.5):
+    """L2 normalized sparse TF-IDF vectors, {id: {term: weight}}, of
+    documents, {id: {term: count}}. Terms found in more than max_df of
+    the documents weigh little and would make the postings huge, they
+    are left out.
+    """
+    df = defaultdict(int)
+    for terms in documents.values():
+        for term in terms:
+            df[term] += 1
+
+    total = len(documents)
+    limit = max(max_df * total, 1)
+    vectors = {}
+    for pk, terms in documents.items():
+        vector = dict((term, (1 + math.log(count)) *
+                       math.log(float(total) / df[term]))
+                      for term, count in terms.items()
+                      if df[term] <= limit)
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        vectors[pk] = dict((term, w / norm) for term, w in vector.items()
+                           if w) if norm else {}
+    return vectors
+
+
+def build_postings(vectors):
+    """Inverted index of vectors, {term: [(id, weight), ...]}"""
+    postings = defaultdict(list)
+    for pk, vector in vectors.items():
+        for term, weight in vector.items():
+            postings[term].append((pk, weight))
+    return postings
+
+
+def nearest(vectors, postings, targets, top=5):
+    """{target id: [(score, id), ...]}, the top cosine neighbours of each
+    target, by walking postings (build_postings of vectors) so only
+    documents sharing a term with the target are scored
+    """
+    neighbours = {}
+    for target in targets:
+        scores = defaultdict(float)
+        for term, weight in vectors.get(target, {}).items():
+            for pk, other in postings.get(term, ()):
+                scores[pk] += weight * other
+        scores.pop(target, None)
+        neighbours[target] = heapq.nlargest(
+            top, ((score, pk) for pk, score in scores.items()))
+    return neighbours
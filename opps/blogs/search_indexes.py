@@ -14,3 +14,16 @@ class BlogPostIndex(ContainerIndex, Indexable):
     def get_model(self):
         return BlogPost
 
+    def index_queryset(self, using=None):
+        # The text template only reads title and short_title, the tags
+        # come from the BlogPostTag rows
+        return super(BlogPostIndex, self).index_queryset(
+            using).prefetch_related('blogposttags')
+
+    def prepare_tags(self, obj):
+        # ContainerIndex goes through get_tags(), a get_or_create per tag
+        tags = []
+        for tag in obj.blogposttags.all():
+            tags.append(tag.slug)
+            tags.append(tag.name)
+        return tags or None
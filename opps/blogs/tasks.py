@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import logging
+import urllib2
+
+import celery
+from django.db.models import get_model
+from django.utils import timezone
+
+from .cache import mark_blog_changed, refresh_related_blogs
+from .conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task
+def publish_scheduled_blogpost(blogpost_id):
+    """Runs when a scheduled post goes live: counts it in its month,
+    starts a new cache generation for its blog and the blog list and,
+    with OPPS_BLOGS_WARM_CACHE, requests the pages that show it so the
+    first reader finds them cached.
+    """
+    # managers imports this module
+    from .managers import month_of
+
+    BlogPost = get_model('blogs', 'BlogPost')
+    try:
+        post = BlogPost.objects.select_related('blog').get(pk=blogpost_id)
+    except BlogPost.DoesNotExist:
+        return
+
+    # Unpublished or moved to a later date, which queued another run
+    if not post.date_listed or post.date_listed > timezone.now():
+        return
+
+    get_model('blogs', 'BlogArchive').objects.refresh(
+        post.blog_id, *month_of(post.date_listed))
+    mark_blog_changed(post.blog.slug)
+    mark_blog_changed(None)
+    refresh_related_blogs([post.blog_id])
+    if settings.OPPS_BLOGS_INDEX_QUEUE:
+        # all_published() left it out of the index until now
+        get_model('blogs', 'BlogPostIndexQueue').objects.enqueue([post.pk])
+
+    if not settings.OPPS_BLOGS_WARM_CACHE:
+        return
+    for path in (post.blog.get_absolute_url(),
+                 '{0}rss'.format(post.blog.get_absolute_url()),
+                 post.get_absolute_url()):
+        url = 'http://{0}{1}'.format(post.site_domain, path)
+        try:
+            urllib2.urlopen(url, timeout=10).read()
+        except (urllib2.URLError, IOError):
+            logger.warning('Could not warm %s', url)
+
+
+def schedule_publish(blogpost_id, date_listed):
+    """Run publish_scheduled_blogpost when date_listed is reached, if
+    OPPS_BLOGS_SCHEDULE_PUBLISH is on
+    """
+    if settings.OPPS_BLOGS_SCHEDULE_PUBLISH:
+        publish_scheduled_blogpost.apply_async(args=[blogpost_id],
+                                               eta=date_listed)
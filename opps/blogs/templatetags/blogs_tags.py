@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
 from django import template
+from django.contrib.sites.models import get_current_site
+from django.core.cache import cache
 from django.utils import timezone
-from django.shortcuts import get_object_or_404
+
+from opps.blogs.cache import (_cache_key, get_blog_generation,
+                              get_blog_timeout, get_site_blogs)
+from opps.blogs.conf import settings
 
 from opps.blogs.models import Blog
 from opps.blogs.models import BlogPost
@@ -21,19 +26,42 @@ def get_blogs(type='blog'):
     return blogs
 
 
+@register.assignment_tag(takes_context=True)
+def get_cached_blogs(context, type='blog', limit=None, order='name'):
+    """Bounded, cached get_blogs: a list of lightweight blog records
+    (name, slug, description, url...) of the current site, e.g.
+    {% get_cached_blogs type='blog' limit=10 order='-date_available' as blogs %}
+    """
+    site = get_current_site(context.get('request'))
+    return get_site_blogs(site, type, int(limit) if limit else None, order)
+
+
 @register.assignment_tag
 def get_blog(slug):
     try:
-        return Blog.objects.get(slug=slug)
+        return Blog.objects.get_by_slug(slug)
     except:
         return None
 
 
 @register.assignment_tag
-def get_blog_posts(slug):
-    blog = get_object_or_404(Blog, slug=slug)
-    posts = BlogPost.objects.filter(
-                blog=blog,
-                date_available__lte=timezone.now()
-            )
-    return posts
\ No newline at end of file
+def get_blog_posts(slug, limit=None):
+    """The latest limit (OPPS_BLOGS_POST_PAGINATE_BY by default) listed
+    posts of blog slug, with blog, category and main image joined, or []
+    when the blog does not exist. Cached for the current generation of
+    the blog, so publishing a post refreshes it.
+    """
+    try:
+        blog = Blog.objects.get_by_slug(slug)
+    except Blog.DoesNotExist:
+        return []
+
+    limit = int(limit or getattr(settings, 'OPPS_BLOGS_POST_PAGINATE_BY', 15))
+    cachekey = _cache_key('posts', slug, limit, get_blog_generation(slug))
+    posts = cache.get(cachekey)
+    if posts is None:
+        posts = list(BlogPost.objects.listed().for_list().filter(
+            blog=blog)[:limit])
+        cache.set(cachekey, posts,
+                  get_blog_timeout(slug, settings.OPPS_BLOGS_CACHE_EXPIRE))
+    return posts
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+import re
+from datetime import timedelta
+
+from django.contrib import admin
+from django.contrib.admin.templatetags.admin_list import results
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sites.models import Site
+from django.db import connection
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.utils import timezone
+from django.utils.unittest import skipUnless
+
+from opps.channels.models import Channel
+
+from .admin import BlogPostAdmin
+from .conf import settings
+from .managers import month_of
+from .models import Blog, BlogPost, Category
+from .tasks import publish_scheduled_blogpost
+from .views import BlogPostList, BlogPostFeed
+
+
+INDEX_RE = re.compile(r'\b{0}\b.*USING (?:COVERING )?INDEX (\S+)'.format(
+    BlogPost._meta.db_table))
+
+
+def get_query_plan(queryset):
+    """EXPLAIN QUERY PLAN lines of queryset"""
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    cursor = connection.cursor()
+    cursor.execute('EXPLAIN QUERY PLAN {0}'.format(sql), params)
+    return [row[-1] for row in cursor.fetchall()]
+
+
+def get_index_columns(table):
+    """{index name: [column, ...]} of table"""
+    cursor = connection.cursor()
+    cursor.execute('PRAGMA index_list("{0}")'.format(table))
+    indexes = {}
+    for row in cursor.fetchall():
+        cursor.execute('PRAGMA index_info("{0}")'.format(row[1]))
+        indexes[row[1]] = [info[2] for info in cursor.fetchall()]
+    return indexes
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite')
+class BlogPostIndexTest(TestCase):
+    """The blog listings are served by their composite indexes, in index
+    order, without sorting the blog's posts
+    """
+
+    def assertUsesIndex(self, queryset, columns):
+        plan = get_query_plan(queryset)
+        indexes = get_index_columns(BlogPost._meta.db_table)
+        used = [indexes.get(m.group(1), []) for m in
+                filter(None, [INDEX_RE.search(line) for line in plan])]
+        self.assertTrue(
+            any(cols[:len(columns)] == columns for cols in used),
+            'No index on ({0}) in:\n{1}'.format(', '.join(columns),
+                                                '\n'.join(plan)))
+        self.assertFalse(any('TEMP B-TREE' in line for line in plan),
+                         'Sorts with a temporary b-tree:\n{0}'.format(
+                             '\n'.join(plan)))
+
+    def test_blogpost_list(self):
+        self.assertUsesIndex(
+            BlogPost.objects.listed().for_list().filter(
+                site_domain='example.com', blog=1)[:15],
+            ['blog_id', 'date_listed'])
+
+    def test_category_list(self):
+        self.assertUsesIndex(
+            BlogPost.objects.listed().for_list().filter(
+                site_domain='example.com', blog=1, category__in=[1])[:15],
+            ['blog_id', 'category_id', 'date_listed'])
+
+    def test_blogpost_feed(self):
+        self.assertUsesIndex(
+            BlogPost.objects.listed().for_list('channel').filter(
+                blog=1)[:40],
+            ['blog_id', 'date_listed'])
+
+
+def count_queries(func):
+    """Number of queries run by func()"""
+    use_debug_cursor = connection.use_debug_cursor
+    connection.use_debug_cursor = True
+    start = len(connection.queries)
+    try:
+        func()
+    finally:
+        connection.use_debug_cursor = use_debug_cursor
+    return len(connection.queries) - start
+
+
+class BlogTestCase(TestCase):
+    """A superuser, the blog channel and a blog with two categories"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'admin')
+        self.site = Site.objects.get_current()
+        past = timezone.now() - timedelta(days=1)
+        self.channel = Channel.objects.create(
+            name='Blog', slug=settings.OPPS_BLOGS_CHANNEL,
+            long_slug=settings.OPPS_BLOGS_CHANNEL, site=self.site,
+            user=self.user, published=True, date_available=past)
+        self.blog = Blog.objects.create(
+            name='Test', slug='test', site=self.site, type='blog',
+            published=True, date_available=past)
+        self.blog.user.add(self.user)
+        self.categories = [Category.objects.create(
+            blog=self.blog, site=self.site, name=slug, slug=slug,
+            long_slug=slug, published=True, date_available=past)
+            for slug in ('one', 'two')]
+        self.created = 0
+
+    def create_post(self, date_available=None):
+        post = BlogPost.objects.create(
+            site=self.site, user=self.user, channel=self.channel,
+            blog=self.blog, category=self.categories[self.created % 2],
+            title='Post {0}'.format(self.created),
+            slug='post-{0}'.format(self.created), content='Content',
+            tags='one,two', published=True, date_available=date_available or (
+                timezone.now() - timedelta(hours=1)))
+        self.created += 1
+        return post
+
+
+class BlogArchiveTest(BlogTestCase):
+
+    def get_count(self, date):
+        year, month = month_of(date)
+        archives = self.blog.archives.filter(year=year, month=month)
+        return archives[0].count if archives else 0
+
+    def test_scheduled_post(self):
+        live = self.create_post()
+        scheduled = self.create_post(timezone.now() + timedelta(days=40))
+        self.assertEqual(self.get_count(live.date_listed), 1)
+        self.assertEqual(self.get_count(scheduled.date_listed), 0)
+
+        # The post goes live in the month of the other one
+        BlogPost.objects.filter(pk=scheduled.pk).update(
+            date_listed=live.date_listed)
+        publish_scheduled_blogpost(scheduled.pk)
+        self.assertEqual(self.get_count(live.date_listed), 2)
+
+
+class BlogPostQueriesTest(BlogTestCase):
+    """Listing more posts runs no more queries"""
+
+    def create_posts(self, count):
+        for i in range(count):
+            self.create_post()
+
+    def assertConstantQueries(self, func):
+        """func() runs as many queries over 2 posts as over 12, once its
+        caches are warm
+        """
+        self.create_posts(2)
+        func()
+        queries = count_queries(func)
+        self.create_posts(10)
+        func()
+        self.assertNumQueries(queries, func)
+
+    def list_blogposts(self):
+        request = self.factory.get('/{0}/test/'.format(
+            settings.OPPS_BLOGS_CHANNEL))
+        request.user = AnonymousUser()
+        response = BlogPostList.as_view()(
+            request, blog__slug='test',
+            channel__long_slug=settings.OPPS_BLOGS_CHANNEL)
+        # What the list templates read of each post
+        for post in response.context_data['object_list']:
+            post.get_absolute_url()
+            post.blog.name
+            post.category and post.category.long_slug
+            post.main_image
+
+    def test_blogpost_list(self):
+        self.assertConstantQueries(self.list_blogposts)
+
+    def list_changelist(self):
+        request = self.factory.get('/admin/blogs/blogpost/')
+        request.user = self.user
+        response = BlogPostAdmin(BlogPost, admin.site).changelist_view(
+            request)
+        # The cells of each row, as the change_list template renders them
+        list(results(response.context_data['cl']))
+
+    def test_blogpost_changelist(self):
+        self.assertConstantQueries(self.list_changelist)
+
+    def build_feed(self):
+        # Filtered feeds skip the feed cache
+        request = self.factory.get(
+            '/{0}/test/rss'.format(settings.OPPS_BLOGS_CHANNEL),
+            {'filter': '{"published": true}'})
+        request.user = AnonymousUser()
+        BlogPostFeed()(request, blog__slug='test')
+
+    def test_blogpost_feed(self):
+        self.assertConstantQueries(self.build_feed)
@@ -1,47 +1,61 @@
 # -*- coding: utf-8 -*-
 from django.conf.urls import patterns, url
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
 
 from .views import (BlogPostList, BlogPostDetail, BlogList, BlogUsersList,
-                    CategoryList, BlogTagList, BlogPostDateList, BlogPostFeed)
+                    CategoryList, BlogTagList, BlogPostDateList, BlogPostFeed,
+                    blog_etag, blog_last_modified, export_blog_posts)
+from .cache import blog_cache_page
 from .conf import settings
 
 
+page_cache = blog_cache_page(settings.OPPS_BLOGS_PAGE_CACHE_EXPIRE)
+
+# Outside page_cache, so a matching If-None-Match/If-Modified-Since gets a
+# 304 before the page cache or the view run
+blog_condition = condition(etag_func=blog_etag,
+                           last_modified_func=blog_last_modified)
+
+
 urlpatterns = patterns(
     '',
     url(r'^{}/(?P<blog__slug>[\w\b-]+)/authors/?$'.format(
         settings.OPPS_BLOGS_CHANNEL),
-        cache_page(settings.OPPS_CACHE_EXPIRE)(BlogUsersList.as_view()),
+        blog_condition(page_cache(BlogUsersList.as_view())),
         name='blogusers-list',
         kwargs={'channel__long_slug': settings.OPPS_BLOGS_CHANNEL}),
+    url(r'^{}/(?P<blog__slug>[\w\b-]+)/export\.(?P<format>jsonl|csv)$'.format(
+        settings.OPPS_BLOGS_CHANNEL),
+        export_blog_posts,
+        name='blogpost-export'),
     url(r'^{}/(?P<blog__slug>[\w\b-]+)/rss/?$'.format(
         settings.OPPS_BLOGS_CHANNEL),
-        cache_page(settings.OPPS_CACHE_EXPIRE)(BlogPostFeed())),
+        blog_condition(BlogPostFeed())),
     url(r'^{}/(?P<blog__slug>[\w\b-]+)/tag/(?P<tag>[\w-]+)$'.format(
         settings.OPPS_BLOGS_CHANNEL),
-        cache_page(settings.OPPS_CACHE_EXPIRE)(BlogTagList.as_view()),
+        blog_condition(page_cache(BlogTagList.as_view())),
         name='blogtag-list',
         kwargs={'channel__long_slug': settings.OPPS_BLOGS_CHANNEL}),
     url(r'^%s/(?P<blog__slug>[\w\b-]+)/(?P<year>[0-9]{4})/(?P<month>[0-9]+)/?$' % settings.OPPS_BLOGS_CHANNEL,
-        cache_page(settings.OPPS_CACHE_EXPIRE)(BlogPostDateList.as_view()),
+        blog_condition(page_cache(BlogPostDateList.as_view())),
         name='blogpost-date-list',
         kwargs={'channel__long_slug': settings.OPPS_BLOGS_CHANNEL}),
     url(r'^{}/(?P<blog__slug>[\w\b-]+)/(?P<category_long_slug>[\w\b//-]+)/(?P<slug>[\w-]+)\.html$'.format(
         settings.OPPS_BLOGS_CHANNEL),
-        cache_page(settings.OPPS_CACHE_EXPIRE)(BlogPostDetail.as_view()),
+        blog_condition(page_cache(BlogPostDetail.as_view())),
         name='blogpost-detail',
         kwargs={'channel__long_slug': settings.OPPS_BLOGS_CHANNEL, }),
     url(r'^{}/(?P<blog__slug>[\w\b-]+)/(?P<category_long_slug>[\w\b//-]+)?/$'.format(
         settings.OPPS_BLOGS_CHANNEL),
-        cache_page(settings.OPPS_CACHE_EXPIRE)(CategoryList.as_view()),
+        blog_condition(page_cache(CategoryList.as_view())),
         name='category-list',
         kwargs={'channel__long_slug': settings.OPPS_BLOGS_CHANNEL}),
     url(r'^{}/(?P<blog__slug>[\w\b-]+)/?$'.format(settings.OPPS_BLOGS_CHANNEL),
-        cache_page(settings.OPPS_CACHE_EXPIRE)(BlogPostList.as_view()),
+        blog_condition(page_cache(BlogPostList.as_view())),
         name='blogpost-list',
         kwargs={'channel__long_slug': settings.OPPS_BLOGS_CHANNEL}),
     url(r'^{}/'.format(settings.OPPS_BLOGS_CHANNEL),
-        cache_page(settings.OPPS_CACHE_EXPIRE)(BlogList.as_view()),
+        page_cache(BlogList.as_view()),
         name='blog-list',
         kwargs={'channel__long_slug': settings.OPPS_BLOGS_CHANNEL}),
 )
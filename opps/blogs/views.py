@@ -1,30 +1,139 @@
 # -*- coding: utf-8 -*-
+from hashlib import md5
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import get_user_model
 from django.contrib.sites.models import get_current_site
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template.response import TemplateResponse
 from django.utils import timezone
-from django.shortcuts import get_object_or_404
-from django.contrib.auth import get_user_model
 from django.utils.translation import ugettext_lazy as _
 
-from opps.channels.models import Channel
 from opps.views.generic.list import ListView
 from opps.contrib.feeds.views import ItemFeed
 from opps.views.generic.detail import DetailView
 from opps.core.tags.views import TagList
-from opps.core.tags.models import Tag
+from opps.utils.text import split_tags
 
-from opps.blogs.models import BlogPost, Blog
+from opps.blogs.models import BlogPost, Blog, Category
+from .cache import (_cache_key, get_blog_channel, get_blog_changed,
+                    get_blog_generation, get_blog_timeout,
+                    get_user_blogs, select_template_name)
 from .conf import settings
+from .export import FORMATS, iter_blogpost_rows
+from .managers import month_range
+from .pagination import CursorPage, paginate_by_cursor
+
+
+def blog_last_modified(request, blog__slug, **kwargs):
+    """Last-Modified of the pages of a blog, for django's condition()"""
+    return get_blog_changed(blog__slug)
+
+
+def blog_etag(request, blog__slug, **kwargs):
+    changed = get_blog_changed(blog__slug)
+    key = u'{0}:{1}'.format(blog__slug, changed.isoformat())
+    return md5(key.encode('utf-8')).hexdigest()
+
+
+@staff_member_required
+def export_blog_posts(request, blog__slug, format):
+    """Stream every post of a blog as JSON lines or CSV. Staff users
+    only get the blogs they can edit in the admin.
+    """
+    try:
+        blog = Blog.objects.get(slug=blog__slug)
+    except Blog.DoesNotExist:
+        raise Http404
+    if not request.user.is_superuser and \
+            blog.pk not in [pk for pk, name in get_user_blogs(request)]:
+        raise PermissionDenied
+
+    export, content_type = FORMATS[format]
+    response = StreamingHttpResponse(export(iter_blogpost_rows(blog)),
+                                     content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename={0}.{1}'.format(
+        blog.slug, format)
+    return response
+
 
-User = get_user_model()
+class BlogTemplateResponse(TemplateResponse):
+    """Resolves the candidate template lists of the blog views through
+    the memoized select_template_name, except in DEBUG.
+    """
+
+    def resolve_template(self, template):
+        if isinstance(template, (list, tuple)) and not settings.DEBUG:
+            template = select_template_name(template)
+        return super(BlogTemplateResponse, self).resolve_template(template)
 
 
 class BlogMixin(object):
+    blog_filters = {}
+    response_class = BlogTemplateResponse
+
+    def get_blog(self, **filters):
+        """Resolve the blog of the current request once, reusing
+        self.blog_obj when it was already loaded.
+        """
+        if getattr(self, 'blog_obj', None) is None:
+            try:
+                self.blog_obj = Blog.objects.get_by_slug(
+                    self.kwargs['blog__slug'])
+            except Blog.DoesNotExist:
+                raise Http404
+        for field, value in filters.items():
+            if getattr(self.blog_obj, field) != value:
+                raise Http404
+        return self.blog_obj
 
     def get_context_data(self, **kwargs):
         context = super(BlogMixin, self).get_context_data(**kwargs)
         if 'blog__slug' in self.kwargs.keys():
-            context['blog'] = get_object_or_404(Blog,
-                                                slug=self.kwargs['blog__slug'])
+            context['blog'] = self.get_blog(**self.blog_filters)
+        return context
+
+
+class CursorPaginationMixin(object):
+    """Keyset pagination on (date_listed, pk) driven by the ?after= and
+    ?before= cursors, enabled by OPPS_BLOGS_CURSOR_PAGINATION.
+    """
+    cursor_pagination = settings.OPPS_BLOGS_CURSOR_PAGINATION
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.cursor_pagination:
+            return super(CursorPaginationMixin, self).paginate_queryset(
+                queryset, page_size)
+        try:
+            page = paginate_by_cursor(queryset, page_size,
+                                      after=self.request.GET.get('after'),
+                                      before=self.request.GET.get('before'))
+        except ValueError:
+            raise Http404
+        return (None, page, page.object_list, page.has_other_pages())
+
+    def get_cursor_url(self, name, cursor):
+        query = self.request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query[name] = cursor
+        return '{0}?{1}'.format(self.request.path, query.urlencode())
+
+    def get_context_data(self, **kwargs):
+        context = super(CursorPaginationMixin, self).get_context_data(
+            **kwargs)
+        page = context.get('page_obj')
+        if isinstance(page, CursorPage):
+            context['next_cursor'] = page.next_cursor
+            context['previous_cursor'] = page.previous_cursor
+            if page.next_cursor:
+                context['next_url'] = self.get_cursor_url(
+                    'after', page.next_cursor)
+            if page.previous_cursor:
+                context['previous_url'] = self.get_cursor_url(
+                    'before', page.previous_cursor)
         return context
 
 
@@ -32,9 +141,9 @@ class BaseListView(BlogMixin, ListView):
 
     def dispatch(self, request, *args, **kwargs):
         self.site = get_current_site(request)
-        self.channel = get_object_or_404(Channel,
-                                         slug=settings.OPPS_BLOGS_CHANNEL,
-                                         site=self.site)
+        self.channel = get_blog_channel(self.site)
+        if self.channel is None:
+            raise Http404
         return super(BaseListView, self).dispatch(request, *args, **kwargs)
 
     def get_template_names(self):
@@ -94,22 +203,14 @@ class BlogUsersList(BaseListView):
 
     def get_queryset(self):
         self.long_slug = self.kwargs['blog__slug']
-        self.blogs = self.model.objects.filter(
-            site_domain=self.site.domain,
-            slug=self.long_slug,
-            date_available__lte=timezone.now(),
-            published=True)
-        if not self.blogs:
-            return []
-        users_ids = []
-        for blog in self.blogs:
-            ids = [i.id for i in blog.user.all()]
-            users_ids.extend(ids)
-        ids = list(set(users_ids))
-        return User.objects.filter(pk__in=ids)
+        blog = self.get_blog()
+        if blog.site_domain != self.site.domain or not blog.is_published():
+            return get_user_model().objects.none()
+        # A queryset: View.get_paginate_by reads its model
+        return blog.get_authors()
 
 
-class BlogPostList(BaseListView):
+class BlogPostList(CursorPaginationMixin, BaseListView):
     model = BlogPost
     type = "blogs"
     channel_long_slug = []
@@ -118,20 +219,42 @@ class BlogPostList(BaseListView):
 
     def get_queryset(self):
         self.long_slug = self.kwargs['blog__slug']
-        self.blog_obj = get_object_or_404(
-            Blog, slug=self.long_slug, published=True, external=False)
-        self.article = self.model.objects.filter(
+        self.blog_obj = self.get_blog(published=True, external=False)
+        self.article = self.model.objects.listed().for_list().filter(
             site_domain=self.site.domain,
-            blog=self.blog_obj,
-            date_available__lte=timezone.now(),
-            published=True)
+            blog=self.blog_obj)
 
         return self.article
 
 
 class BlogPostFeed(ItemFeed):
+    """The unfiltered feed of each blog is serialized once and served
+    from the cache for the current blog generation, i.e. until a post or
+    the blog changes or a scheduled post goes live. Feeds filtered through
+    the querystring are built per request.
+    """
     link = "/rss"
 
+    def __call__(self, request, *args, **kwargs):
+        cachekey = None
+        slug = kwargs['blog__slug']
+        if not any(k.startswith(('filter', 'exclude')) for k in request.GET):
+            cachekey = _cache_key('feed', get_current_site(request).pk,
+                                  slug, get_blog_generation(slug))
+            cached = cache.get(cachekey)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+        response = super(BlogPostFeed, self).__call__(request, *args,
+                                                      **kwargs)
+        # Validators come from blog_last_modified/blog_etag (urls.py)
+        del response['Last-Modified']
+        if cachekey:
+            cache.set(cachekey, (response.content, response['Content-Type']),
+                      get_blog_timeout(slug, settings.OPPS_BLOGS_CACHE_EXPIRE))
+        return response
+
     def item_enclosure_url(self, item):
         if item.main_image:
             if item.main_image.archive:
@@ -146,6 +269,12 @@ class BlogPostFeed(ItemFeed):
                 i_url = "http://" + item.site_domain + i_url
             return i_url
 
+    def item_categories(self, item):
+        # ItemFeed's goes through get_tags, a get_or_create per tag
+        categories = [item.channel.name] if item.channel_id else []
+        categories.extend(split_tags(item.tags or ''))
+        return categories
+
     def title(self):
         return _("{0}'s news".format(get_current_site(self.request)))
 
@@ -153,22 +282,25 @@ class BlogPostFeed(ItemFeed):
         return _("Latest news on {0}'s".format(get_current_site(self.request)))
 
     def get_object(self, request, blog__slug):
-        blog = get_object_or_404(
-            Blog, slug=blog__slug, published=True, external=False)
+        try:
+            blog = Blog.objects.get_by_slug(blog__slug, published=True,
+                                            external=False)
+        except Blog.DoesNotExist:
+            raise Http404
         self.request = request
         return blog
 
     def items(self, obj):
-        filters = self.build_filters().get('filter', {})
-        excludes = self.build_filters().get('exclude', {})
+        lookups = self.build_filters()
+        filters = lookups.get('filter', {})
+        excludes = lookups.get('exclude', {})
 
-        qs = BlogPost.objects.filter(
+        # item_categories reads the channel and tags of every item
+        qs = BlogPost.objects.listed().for_list('channel').filter(
             blog=obj,
-            date_available__lte=timezone.now(),
-            published=True,
             **filters).exclude(
                 **excludes
-            ).order_by('-date_available')[:40]
+            )[:40]
 
         return qs
 
@@ -178,65 +310,56 @@ class BlogPostDateList(BlogPostList):
         self.long_slug = self.kwargs['blog__slug']
         self.year = int(self.kwargs['year'])
         self.month = int(self.kwargs['month'])
-        self.blog_obj = get_object_or_404(Blog,
-                                          slug=self.long_slug,
-                                          published=True,
-                                          external=False)
+        self.blog_obj = self.get_blog(published=True, external=False)
+        try:
+            start, end = month_range(self.year, self.month)
+        except ValueError:
+            raise Http404
 
-        self.article = self.model.objects.filter(
+        self.article = self.model.objects.listed().for_list().filter(
             site_domain=self.site.domain,
             blog=self.blog_obj,
-            date_available__year=self.year,
-            date_available__month=self.month,
-            published=True)
+            date_listed__gte=start,
+            date_listed__lt=end)
 
         return self.article
 
 
-class CategoryList(BaseListView):
+class CategoryList(CursorPaginationMixin, BaseListView):
     model = BlogPost
     paginate_suffix = 'list'
 
     def get_queryset(self):
         self.long_slug = self.kwargs['blog__slug']
         self.category_long_slug = self.kwargs['category_long_slug']
-        self.blog_obj = get_object_or_404(Blog,
-                                          slug=self.long_slug,
-                                          published=True,
-                                          external=False)
-        self.article = self.model.objects.filter(
+        self.blog_obj = self.get_blog(published=True, external=False)
+        # Filter on category ids, not category__long_slug, so the
+        # (blog, category, date_listed) index drives the query
+        categories = Category.objects.filter(
+            blog=self.blog_obj,
+            long_slug=self.category_long_slug,
+        ).values_list('pk', flat=True)
+        self.article = self.model.objects.listed().for_list().filter(
             site_domain=self.site.domain,
             blog=self.blog_obj,
-            category__long_slug=self.category_long_slug,
-            date_available__lte=timezone.now(),
-            published=True)
+            category__in=list(categories))
 
         return self.article
 
 
-class BlogPostDetail(DetailView):
+class BlogPostDetail(BlogMixin, DetailView):
     model = BlogPost
     paginate_suffix = 'detail'
+    blog_filters = {'published': True, 'external': False}
 
     def dispatch(self, request, *args, **kwargs):
         self.site = get_current_site(request)
-        self.channel = get_object_or_404(Channel,
-                                         slug=settings.OPPS_BLOGS_CHANNEL,
-                                         site=self.site)
+        self.channel = get_blog_channel(self.site)
+        if self.channel is None:
+            raise Http404
 
         return super(BlogPostDetail, self).dispatch(request, *args, **kwargs)
 
-    def get_context_data(self, **kwargs):
-        context = super(BlogPostDetail, self).get_context_data(**kwargs)
-
-        if 'blog__slug' in self.kwargs.keys():
-            context['blog'] = get_object_or_404(Blog,
-                                                slug=self.kwargs['blog__slug'],
-                                                published=True,
-                                                external=False)
-
-        return context
-
     def get_template_names(self):
         domain_folder = self.get_template_folder()
         templates = ['{}/blogs/{}/detail.html'.format(
@@ -252,13 +375,19 @@ class BlogPostDetail(DetailView):
         self.category_long_slug = self.kwargs['category_long_slug']
         lookups = dict(
             site_domain=self.site.domain,
-            blog__slug=self.long_slug,
-            slug=self.kwargs['slug'],
+            blog=self.get_blog(**self.blog_filters),
             published=True,
             date_available__lte=timezone.now()
         )
-        if not self.category_long_slug == 'sem-categoria':
-            lookups['category__long_slug'] = self.category_long_slug
+        if self.category_long_slug == 'sem-categoria':
+            # Any post of the blog is reachable under sem-categoria
+            lookups['slug'] = self.kwargs['slug']
+        else:
+            # Served by the (blog, path_hash) index, path rules out a
+            # hash collision
+            lookups['path'] = self.model.make_path(
+                self.long_slug, self.category_long_slug, self.kwargs['slug'])
+            lookups['path_hash'] = self.model.hash_path(lookups['path'])
 
         self.article = self.model.objects.filter(**lookups)
         return self.article
@@ -284,27 +413,12 @@ class BlogTagList(BlogMixin, TagList):
         self.long_slug = 'tags'
         self.tag = self.kwargs['tag']
 
-        tags = Tag.objects.filter(slug=self.tag).values_list('name') or []
-        tags_names = []
-        if tags:
-            tags_names = [i[0] for i in tags]
-
-        ids = []
-        for tag in tags_names:
-            result = self.containers = self.model.objects.filter(
-                site_domain=self.site,
-                tags__contains=tag,
-                date_available__lte=timezone.now(),
-                published=True,
-                blog__slug=self.kwargs['blog__slug'],
-            )
-            if result.exists():
-                ids.extend([i.id for i in result])
-
-        # remove the repeated
-        ids = list(set(ids))
-
-        # grab the blogposts
-        self.containers = self.model.objects.filter(id__in=ids)
+        self.containers = self.model.objects.for_list().filter(
+            site_domain=self.site.domain,
+            blog=self.get_blog(),
+            blogposttags__slug=self.tag,
+            date_available__lte=timezone.now(),
+            published=True,
+        )
 
         return self.containers